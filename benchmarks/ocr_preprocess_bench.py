@@ -0,0 +1,327 @@
+"""
+Сравнение OCR-профилей OcrProfile по времени и полноте.
+
+    python -m benchmarks.ocr_preprocess_bench path/to/images
+    python -m benchmarks.ocr_preprocess_bench --synthetic 40
+
+Для каждой картинки и профиля замеряется полный путь воркера
+(декодирование + подготовка + tesseract), печатаются медиана, p95,
+среднее и число запусков tesseract на картинку. Без tesseract в PATH
+замеряется только подготовка (всё, кроме самого tesseract).
+
+Полнота проверяется двумя способами:
+- строки — на синтетических картинках известно, где нарисован текст;
+  строка считается прочитанной, если попала в вырезку для tesseract;
+- слова — слова, которые находит проход по всей картинке (RAW),
+  должны находиться и профилем (только с tesseract).
+Если полнота FAST ниже --min-recall, скрипт завершается с кодом 1.
+"""
+import argparse
+import random
+import re
+import shutil
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+from constants.group_constants import OcrProfile
+from moderation.image_frame import ImageFrame
+from moderation.ocr_preprocess import (
+    OCR_PROFILES,
+    binarize,
+    ocr_frame,
+    plan_ocr,
+    resize_to_side,
+)
+
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+SAMPLE_LINES = (
+    "SALE -50% ONLY TODAY",
+    "write to @shop_bot now",
+    "easy money no deposit",
+    "crypto signals 24/7",
+    "subscribe to the channel",
+)
+
+_WORD_RE = re.compile(r"\w{3,}")
+
+Box = tuple[int, int, int, int]
+
+
+@dataclass
+class Sample:
+    data: bytes
+    # рамки нарисованных строк (x, y, w, h); None — неизвестно
+    lines: list[Box] | None = None
+
+
+@dataclass
+class ProfileResult:
+    timings: list[float] = field(default_factory=list)
+    calls: int = 0
+    skipped: int = 0
+    lines_total: int = 0
+    lines_found: int = 0
+    words_total: int = 0
+    words_found: int = 0
+
+
+def load_corpus(path: Path) -> list[Sample]:
+    return [
+        Sample(file.read_bytes())
+        for file in sorted(path.iterdir())
+        if file.suffix.lower() in IMAGE_SUFFIXES
+    ]
+
+
+def _draw_line(
+    image: np.ndarray,
+    text: str,
+    origin: tuple[int, int],
+    scale: float,
+    thickness: int,
+    color: tuple[int, int, int],
+) -> Box:
+    (w, h), baseline = cv2.getTextSize(
+        text,
+        cv2.FONT_HERSHEY_SIMPLEX,
+        scale,
+        thickness,
+    )
+    x, y = origin
+    cv2.putText(
+        image,
+        text,
+        origin,
+        cv2.FONT_HERSHEY_SIMPLEX,
+        scale,
+        color,
+        thickness,
+    )
+    return (x, y - h, w, h + baseline)
+
+
+def _photo(rng: random.Random, index: int, with_text: bool) -> Sample:
+    height, width = rng.choice(((1280, 960), (1600, 1200), (2560, 1440)))
+    noise = np.random.default_rng(index).integers(
+        0, 255, (height // 16, width // 16, 3), dtype=np.uint8,
+    )
+    image = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    lines = []
+    if with_text:
+        for line in range(rng.randint(1, 4)):
+            lines.append(_draw_line(
+                image,
+                rng.choice(SAMPLE_LINES),
+                (rng.randint(10, width // 4), 150 + line * height // 5),
+                width / 600,
+                max(2, width // 400),
+                (255, 255, 255),
+            ))
+
+    return _encode(image, lines)
+
+
+def _paragraph(rng: random.Random, line_count: int, size: Box) -> Sample:
+    """Светлый фон, плотные строки текста: абзац или скриншот переписки"""
+    width, height = size[2], size[3]
+    image = np.full((height, width, 3), 245, np.uint8)
+
+    step = (height - 80) // line_count
+    scale = step / 40
+    lines = []
+
+    for line in range(line_count):
+        # реплики переписки — то слева, то справа
+        x = 30 if line % 2 == 0 else width // 3
+        lines.append(_draw_line(
+            image,
+            rng.choice(SAMPLE_LINES),
+            (x, 60 + line * step),
+            scale,
+            max(1, round(scale * 2)),
+            (20, 20, 20),
+        ))
+
+    return _encode(image, lines)
+
+
+def _encode(image: np.ndarray, lines: list[Box]) -> Sample:
+    _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return Sample(encoded.tobytes(), lines)
+
+
+def synthetic_corpus(count: int, seed: int = 1) -> list[Sample]:
+    """
+    Фото с парой строк и без текста, абзацы на 25 строк и портретные
+    скриншоты на 40 строк — на последних видно, всё ли читает FAST
+    """
+    rng = random.Random(seed)
+    corpus = []
+
+    for index in range(count):
+        kind = index % 4
+        if kind == 0:
+            corpus.append(_photo(rng, index, with_text=True))
+        elif kind == 1:
+            corpus.append(_photo(rng, index, with_text=False))
+        elif kind == 2:
+            corpus.append(_paragraph(rng, 25, (0, 0, 1600, 1200)))
+        else:
+            corpus.append(_paragraph(rng, 40, (0, 0, 1080, 2340)))
+
+    return corpus
+
+
+def _covered(line: Box, boxes: list[Box], scale: float) -> bool:
+    """Строка на 90% внутри вырезок (строку могут делить соседние блоки)"""
+    x, y, w, h = (round(v * scale) for v in line)
+    if w <= 0 or h <= 0:
+        return False
+
+    mask = np.zeros((h, w), np.bool_)
+    for bx, by, bw, bh in boxes:
+        left, top = max(x, bx) - x, max(y, by) - y
+        right, bottom = min(x + w, bx + bw) - x, min(y + h, by + bh) - y
+        if right > left and bottom > top:
+            mask[top:bottom, left:right] = True
+
+    return mask.mean() >= 0.9
+
+
+def _words(text: str) -> set[str]:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def bench(
+    corpus: list[Sample],
+    repeat: int,
+    with_tesseract: bool,
+) -> dict[OcrProfile, ProfileResult]:
+    results = {profile: ProfileResult() for profile in OcrProfile}
+
+    for sample in corpus:
+        full_text_words: set[str] | None = None
+
+        for profile in OcrProfile:
+            options = OCR_PROFILES[profile]
+            result = results[profile]
+            text = ""
+
+            for _ in range(repeat):
+                started = time.perf_counter()
+                frame = ImageFrame.decode(memoryview(sample.data))
+
+                if with_tesseract:
+                    text = ocr_frame(frame, options)
+                elif options.preprocess:
+                    gray = resize_to_side(frame.gray, options.target_side)
+                    for (x, y, w, h), _ in plan_ocr(gray, options):
+                        binarize(gray[y:y + h, x:x + w])
+
+                result.timings.append(time.perf_counter() - started)
+
+            if options.preprocess:
+                gray = resize_to_side(frame.gray, options.target_side)
+                plan = plan_ocr(gray, options)
+                boxes = [box for box, _ in plan]
+                scale = gray.shape[0] / frame.height
+            else:
+                plan = [((0, 0, frame.width, frame.height), "")]
+                boxes = [plan[0][0]]
+                scale = 1.0
+
+            result.calls += len(plan)
+            result.skipped += not plan
+
+            if sample.lines is not None:
+                result.lines_total += len(sample.lines)
+                result.lines_found += sum(
+                    _covered(line, boxes, scale) for line in sample.lines
+                )
+
+            if with_tesseract:
+                words = _words(text)
+                if profile == OcrProfile.RAW:
+                    full_text_words = words
+                elif full_text_words:
+                    result.words_total += len(full_text_words)
+                    result.words_found += len(full_text_words & words)
+
+    return results
+
+
+def _ratio(found: int, total: int) -> str:
+    # без округления вверх: 338/339 — это не 100%
+    return f"{found}/{total} {found / total:.1%}" if total else "—"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("corpus", nargs="?", type=Path)
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--min-recall", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = synthetic_corpus(args.synthetic or 20)
+
+    if not corpus:
+        parser.error("в корпусе нет картинок")
+
+    with_tesseract = shutil.which("tesseract") is not None
+    results = bench(corpus, args.repeat, with_tesseract)
+
+    print(f"картинок: {len(corpus)}, повторов: {args.repeat}")
+    if not with_tesseract:
+        print("tesseract не найден: время — только подготовка, без OCR")
+    print()
+    print(f"{'профиль':<10}{'медиана':>10}{'p95':>10}{'среднее':>10}"
+          f"{'вызовов':>9}{'без OCR':>9}{'строки':>20}{'слова':>20}")
+
+    for profile, result in results.items():
+        timings = sorted(result.timings)
+        p95 = timings[int(0.95 * (len(timings) - 1))]
+        print(
+            f"{profile.value:<10}"
+            f"{statistics.median(timings) * 1000:>8.0f}ms"
+            f"{p95 * 1000:>8.0f}ms"
+            f"{statistics.fmean(timings) * 1000:>8.0f}ms"
+            f"{result.calls / len(corpus):>9.2f}"
+            f"{result.skipped:>9}"
+            f"{_ratio(result.lines_found, result.lines_total):>20}"
+            f"{_ratio(result.words_found, result.words_total):>20}"
+        )
+
+    fast = results[OcrProfile.FAST]
+    failed = False
+    for what, found, total in (
+        ("строки", fast.lines_found, fast.lines_total),
+        ("слова", fast.words_found, fast.words_total),
+    ):
+        if total and found / total < args.min_recall:
+            print(f"\nFAST читает не всё: {what} {_ratio(found, total)}")
+            failed = True
+
+    if failed:
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import os
+
+import dotenv
+
+
+dotenv.load_dotenv()
+
+
+# deleteMessages принимает не больше 100 id за вызов
+DELETE_MESSAGES_CHUNK = 100
+BULK_DELETE_CONCURRENCY = int(os.getenv("BULK_DELETE_CONCURRENCY", 4))
+
+# История сообщений в личке для /clear
+DM_HISTORY_PER_CHAT = int(os.getenv("DM_HISTORY_PER_CHAT", 300))
+DM_HISTORY_MAX_CHATS = int(os.getenv("DM_HISTORY_MAX_CHATS", 10_000))
+
+# Исходящие запросы к Bot API: лимиты в запросах в секунду и запас
+# (burst) — общий на бота, на личный чат и на группу
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", 30))
+OUTBOUND_GLOBAL_BURST = int(os.getenv("OUTBOUND_GLOBAL_BURST", 30))
+OUTBOUND_PRIVATE_RATE = float(os.getenv("OUTBOUND_PRIVATE_RATE", 1))
+OUTBOUND_PRIVATE_BURST = int(os.getenv("OUTBOUND_PRIVATE_BURST", 5))
+OUTBOUND_GROUP_RATE = float(os.getenv("OUTBOUND_GROUP_RATE", 20 / 60))
+OUTBOUND_GROUP_BURST = int(os.getenv("OUTBOUND_GROUP_BURST", 10))
+# сколько раз повторять запрос после TelegramRetryAfter
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", 3))
+# для скольких чатов держать состояние лимитов
+OUTBOUND_MAX_CHATS = int(os.getenv("OUTBOUND_MAX_CHATS", 10_000))
@@ -1,6 +1,61 @@
 import enum
+import os
+
+import dotenv
+
+
+dotenv.load_dotenv()
 
 
 class CaptchaStatus(enum.Enum):
     SOLVED = "solved"
     PENDING = "pending"
+
+
+class CaptchaMode(enum.Enum):
+    # кнопка «Я не бот»
+    BUTTON = "button"
+    # картинка с кодом и варианты ответа на кнопках
+    IMAGE = "image"
+
+
+# Сколько секунд даётся на прохождение капчи
+CAPTCHA_TIMEOUT = int(os.getenv("CAPTCHA_TIMEOUT", 30))
+# Истёкшие капчи разбираются пачками: всё, что истекает в пределах
+# этого окна (сек), удаляется одним проходом
+CAPTCHA_EXPIRY_BATCH_WINDOW = float(os.getenv("CAPTCHA_EXPIRY_BATCH_WINDOW", 1))
+
+# Ожидающие капчи сохраняются в sqlite-файл и переживают рестарт
+# ("" — хранить только в памяти); запись идёт пачками раз в интервал
+CAPTCHA_STORE_PATH = os.getenv("CAPTCHA_STORE_PATH", "pending_captcha.sqlite3")
+CAPTCHA_STORE_FLUSH_INTERVAL = float(os.getenv("CAPTCHA_STORE_FLUSH_INTERVAL", 0.5))
+
+# Для скольких групп держать в памяти множество пользователей,
+# которым капча не нужна (прошли её или админы)
+VERIFIED_MEMBERS_MAX_CHATS = int(os.getenv("VERIFIED_MEMBERS_MAX_CHATS", 10_000))
+
+# Рейд: столько вступлений/первых сообщений за RAID_WINDOW секунд
+# включают режим рейда в чате; он держится RAID_COOLDOWN секунд
+# после последнего всплеска
+RAID_WINDOW = float(os.getenv("RAID_WINDOW", 10))
+RAID_THRESHOLD = int(os.getenv("RAID_THRESHOLD", 8))
+RAID_COOLDOWN = float(os.getenv("RAID_COOLDOWN", 60))
+# Во время рейда капча одна на чат и обновляется раз в интервал
+RAID_PROMPT_EDIT_INTERVAL = float(os.getenv("RAID_PROMPT_EDIT_INTERVAL", 5))
+RAID_PROMPT_MAX_MENTIONS = int(os.getenv("RAID_PROMPT_MAX_MENTIONS", 20))
+# telegram_user_id в CaptchaCallbackData общей капчи — нажать может
+# любой, кто её ждёт
+SHARED_CAPTCHA_USER_ID = 0
+
+# Картинки для капчи рисуются заранее в фоне: сколько держать готовых,
+# сколько раз показывать одну (file_id переиспользуется) и сколько
+# вариантов ответа на кнопках
+CAPTCHA_IMAGE_POOL_SIZE = int(os.getenv("CAPTCHA_IMAGE_POOL_SIZE", 50))
+CAPTCHA_IMAGE_MAX_USES = int(os.getenv("CAPTCHA_IMAGE_MAX_USES", 20))
+CAPTCHA_IMAGE_OPTIONS = int(os.getenv("CAPTCHA_IMAGE_OPTIONS", 4))
+
+# Заявки на вступление: сколько секунд ждать ответа на капчу в личке,
+# как часто и какими пачками одобрять/отклонять заявки
+JOIN_REQUEST_TIMEOUT = int(os.getenv("JOIN_REQUEST_TIMEOUT", 180))
+JOIN_APPROVE_INTERVAL = float(os.getenv("JOIN_APPROVE_INTERVAL", 1))
+JOIN_APPROVE_BATCH = int(os.getenv("JOIN_APPROVE_BATCH", 20))
@@ -0,0 +1,12 @@
+import os
+
+import dotenv
+
+
+dotenv.load_dotenv()
+
+
+# Бюджет запросов к БД на один апдейт: превышение пишется в лог
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", 3))
+# суммарное время запросов апдейта (сек), после которого он считается медленным
+QUERY_BUDGET_DB_TIME = float(os.getenv("QUERY_BUDGET_DB_TIME", 0.1))
@@ -10,3 +10,12 @@ class GroupUserRole(enum.Enum):
     ADMIN = "admin"
     MEMBER = "member"
     OWNER = "owner"
+
+
+class OcrProfile(enum.Enum):
+    # tesseract по всей картинке, без подготовки
+    RAW = "raw"
+    # уменьшение, бинаризация и OCR только по найденным блокам текста
+    FAST = "fast"
+    # бинаризация всей картинки в большем разрешении
+    ACCURATE = "accurate"
@@ -0,0 +1,62 @@
+import os
+
+import dotenv
+
+
+dotenv.load_dotenv()
+
+
+# Кэш контекста группы (настройки, подписка, бан-слова)
+GROUP_CONTEXT_CACHE_SIZE = int(os.getenv("GROUP_CONTEXT_CACHE_SIZE", 10_000))
+GROUP_CONTEXT_CACHE_TTL = float(os.getenv("GROUP_CONTEXT_CACHE_TTL", 300))
+
+# Пул процессов для QR/OCR
+IMAGE_ENGINE_WORKERS = int(os.getenv("IMAGE_ENGINE_WORKERS", os.cpu_count() or 1))
+# сколько задач может ждать свободный процесс, остальные отбрасываются
+IMAGE_ENGINE_QUEUE_SIZE = int(os.getenv("IMAGE_ENGINE_QUEUE_SIZE", 64))
+IMAGE_ENGINE_JOB_TIMEOUT = float(os.getenv("IMAGE_ENGINE_JOB_TIMEOUT", 20))
+
+# Кэш результатов проверки картинок по file_unique_id
+PHOTO_VERDICT_CACHE_SIZE = int(os.getenv("PHOTO_VERDICT_CACHE_SIZE", 50_000))
+# путь к sqlite-файлу; пусто — кэш только в памяти
+PHOTO_VERDICT_CACHE_PATH = os.getenv("PHOTO_VERDICT_CACHE_PATH", "")
+PHOTO_VERDICT_DISK_MAX_ROWS = int(os.getenv("PHOTO_VERDICT_DISK_MAX_ROWS", 1_000_000))
+
+# Размеры фото для этапов проверки (по большей стороне, px).
+# Берётся наименьший PhotoSize не меньше порога, иначе самый большой.
+PHOTO_QR_MIN_SIDE = int(os.getenv("PHOTO_QR_MIN_SIDE", 640))
+PHOTO_OCR_MIN_SIDE = int(os.getenv("PHOTO_OCR_MIN_SIDE", 1280))
+# повторять поиск QR на картинке для OCR, если она крупнее
+PHOTO_QR_RECHECK_ON_OCR = os.getenv("PHOTO_QR_RECHECK_ON_OCR", "0") == "1"
+
+# Фоновая проверка фото: хендлер получает апдейт сразу,
+# а сообщение удаляется позже, если картинка нарушает правила
+MODERATION_ASYNC_PHOTO_SCAN = os.getenv("MODERATION_ASYNC_PHOTO_SCAN", "0") == "1"
+MODERATION_QUEUE_SIZE = int(os.getenv("MODERATION_QUEUE_SIZE", 500))
+MODERATION_WORKERS = int(os.getenv("MODERATION_WORKERS", 4))
+
+# Альбомы: сколько ждать следующих элементов после последнего (сек)
+ALBUM_COLLECT_WINDOW = float(os.getenv("ALBUM_COLLECT_WINDOW", 1.5))
+# и сколько максимум держать альбом с момента первого элемента
+ALBUM_COLLECT_MAX_WAIT = float(os.getenv("ALBUM_COLLECT_MAX_WAIT", 5))
+
+# GIF, видео, кружки и стикеры: сколько кадров брать и сколько
+# секунд максимум тратить на одно сообщение каждого типа
+MEDIA_MAX_FRAMES = int(os.getenv("MEDIA_MAX_FRAMES", 4))
+MEDIA_FRAME_MAX_SIDE = int(os.getenv("MEDIA_FRAME_MAX_SIDE", 1280))
+MEDIA_MAX_DOWNLOAD_BYTES = int(os.getenv("MEDIA_MAX_DOWNLOAD_BYTES", 20 * 1024 * 1024))
+MEDIA_TIME_BUDGETS = {
+    "animation": float(os.getenv("MEDIA_BUDGET_ANIMATION", 15)),
+    "video": float(os.getenv("MEDIA_BUDGET_VIDEO", 25)),
+    "video_note": float(os.getenv("MEDIA_BUDGET_VIDEO_NOTE", 15)),
+    "sticker": float(os.getenv("MEDIA_BUDGET_STICKER", 8)),
+    "document": float(os.getenv("MEDIA_BUDGET_DOCUMENT", 20)),
+}
+
+# Картинки, отправленные файлом: сколько байт максимум скачивать,
+# до какой стороны уменьшать перед QR/OCR и сколько пикселей
+# максимум декодировать (защита памяти от «бомб» 20000x20000)
+DOCUMENT_MAX_DOWNLOAD_BYTES = int(os.getenv("DOCUMENT_MAX_DOWNLOAD_BYTES", 20 * 1024 * 1024))
+DOCUMENT_MAX_SIDE = int(os.getenv("DOCUMENT_MAX_SIDE", 2000))
+DOCUMENT_MAX_PIXELS = int(os.getenv("DOCUMENT_MAX_PIXELS", 40_000_000))
+DOCUMENT_DOWNLOAD_CHUNK = 64 * 1024
@@ -1,4 +1,10 @@
 import enum
+import os
+
+import dotenv
+
+
+dotenv.load_dotenv()
 
 
 class UserRole(enum.Enum):
@@ -10,3 +16,15 @@ class UserStatus(enum.Enum):
     ACTIVE = "active"
     INACTIVE = "inactive"
     BANNED = "banned"
+
+
+# Синхронизация участников групп пачками: сброс раз в интервал (сек)
+# или при накоплении MEMBERSHIP_FLUSH_MAX наблюдений; уже записанные
+# пары (пользователь, чат) помнятся и повторно не пишутся
+MEMBERSHIP_FLUSH_INTERVAL = float(os.getenv("MEMBERSHIP_FLUSH_INTERVAL", 0.5))
+MEMBERSHIP_FLUSH_MAX = int(os.getenv("MEMBERSHIP_FLUSH_MAX", 500))
+MEMBERSHIP_KNOWN_MAX = int(os.getenv("MEMBERSHIP_KNOWN_MAX", 200_000))
+
+# Карта telegram id → внутренний id (users.id / groups.id)
+IDENTITY_MAP_MAX_USERS = int(os.getenv("IDENTITY_MAP_MAX_USERS", 200_000))
+IDENTITY_MAP_MAX_GROUPS = int(os.getenv("IDENTITY_MAP_MAX_GROUPS", 20_000))
@@ -15,7 +15,8 @@ from sqlalchemy.orm import (
 )
 
 from database.base import Base
-from constants.group_constants import GroupType
+from constants.group_constants import GroupType, OcrProfile
+from constants.captcha_constants import CaptchaMode
 
 
 class Group(Base):
@@ -120,6 +121,26 @@ class GroupSettings(Base):
         nullable=False,
     )
 
+    ocr_profile: Mapped[OcrProfile] = mapped_column(
+        Enum(
+            OcrProfile,
+            name="group_ocr_profile_enum",
+        ),
+        nullable=False,
+        default=OcrProfile.FAST,
+        server_default=OcrProfile.FAST.name,
+    )
+
+    captcha_mode: Mapped[CaptchaMode] = mapped_column(
+        Enum(
+            CaptchaMode,
+            name="group_captcha_mode_enum",
+        ),
+        nullable=False,
+        default=CaptchaMode.BUTTON,
+        server_default=CaptchaMode.BUTTON.name,
+    )
+
     group: Mapped["Group"] = relationship(
         "Group",
         back_populates="settings",
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, Session, object_session
+
+from constants.user_constants import (
+    IDENTITY_MAP_MAX_GROUPS,
+    IDENTITY_MAP_MAX_USERS,
+)
+from database.groups import Group
+from database.users import User
+
+
+class IdentityMap:
+    """
+    Ограниченный LRU: внешний telegram id → внутренний первичный ключ.
+
+    Пара не меняется после вставки строки, поэтому хранится без TTL.
+    Заполняется при любой загрузке строки через ORM, после коммита
+    вставки и в resolve(); удаление строки убирает пару.
+    """
+
+    def __init__(
+        self,
+        key: InstrumentedAttribute,
+        pk: InstrumentedAttribute,
+        maxsize: int,
+    ):
+        self.key = key
+        self.pk = pk
+        self.maxsize = maxsize
+
+        self._ids: OrderedDict[int, int] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, external_id: int) -> int | None:
+        internal_id = self._ids.get(external_id)
+        if internal_id is not None:
+            self._ids.move_to_end(external_id)
+        return internal_id
+
+    def put(self, external_id: int, internal_id: int) -> None:
+        self._ids[external_id] = internal_id
+        self._ids.move_to_end(external_id)
+
+        while len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def discard(self, external_id: int) -> None:
+        self._ids.pop(external_id, None)
+
+    async def resolve(
+        self,
+        session: AsyncSession,
+        external_id: int,
+    ) -> int | None:
+        """Внутренний id или None, если строки нет; в БД — только при промахе"""
+        internal_id = self.get(external_id)
+        if internal_id is not None:
+            self.hits += 1
+            return internal_id
+
+        self.misses += 1
+        result = await session.execute(
+            select(self.pk).where(self.key == external_id)
+        )
+        internal_id = result.scalar()
+
+        # отсутствие не кэшируется: строку могут вставить в любой момент
+        if internal_id is not None:
+            self.put(external_id, internal_id)
+
+        return internal_id
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+user_ids = IdentityMap(
+    key=User.telegram_user_id,
+    pk=User.id,
+    maxsize=IDENTITY_MAP_MAX_USERS,
+)
+group_ids = IdentityMap(
+    key=Group.chat_id,
+    pk=Group.id,
+    maxsize=IDENTITY_MAP_MAX_GROUPS,
+)
+
+_MAPS: dict[type, IdentityMap] = {
+    User: user_ids,
+    Group: group_ids,
+}
+
+# вставки текущей транзакции: попадают в карту только после коммита
+_PENDING = "identity_map_inserts"
+
+
+def _ids_of(instance: Any) -> tuple[IdentityMap, int, int] | None:
+    identity = _MAPS[type(instance)]
+    state = instance.__dict__
+    external_id = state.get(identity.key.key)
+    internal_id = state.get(identity.pk.key)
+
+    if external_id is None or internal_id is None:
+        return None
+
+    return identity, external_id, internal_id
+
+
+def _on_load(instance: Any, _context: Any) -> None:
+    ids = _ids_of(instance)
+    if ids is not None:
+        identity, external_id, internal_id = ids
+        identity.put(external_id, internal_id)
+
+
+def _on_insert(_mapper: Any, _connection: Any, instance: Any) -> None:
+    ids = _ids_of(instance)
+    session = object_session(instance)
+    if ids is not None and session is not None:
+        session.info.setdefault(_PENDING, []).append(ids)
+
+
+def _on_delete(_mapper: Any, _connection: Any, instance: Any) -> None:
+    ids = _ids_of(instance)
+    if ids is not None:
+        identity, external_id, _ = ids
+        identity.discard(external_id)
+
+
+for _model in _MAPS:
+    event.listen(_model, "load", _on_load)
+    event.listen(_model, "after_insert", _on_insert)
+    event.listen(_model, "after_delete", _on_delete)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_inserts(session: Session) -> None:
+    for identity, external_id, internal_id in session.info.pop(_PENDING, ()):
+        identity.put(external_id, internal_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_inserts(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -1,3 +1,5 @@
+from sqlalchemy import func, select, union
+from sqlalchemy.dialects.mysql import insert
 from sqlalchemy_manager.managers import AsyncManager
 from database.captcha_logs import CaptchaLogs
 from database.groups import Group, GroupSettings, Banwords
@@ -5,10 +7,35 @@ from database.users import User
 from database.users_groups import UserGroup
 from database.paginators import UserGroupPaginator
 from database.promocodes import Promocode
+from constants.captcha_constants import CaptchaStatus
+from constants.group_constants import GroupUserRole
 
 
 class UserManager(AsyncManager[User]):
-    pass
+    async def upsert(self, telegram_user_id: int, username: str | None) -> int:
+        """
+        users.id пользователя; если записи нет — создаёт её.
+
+        INSERT ... ON DUPLICATE KEY UPDATE, как в membership_sync: запись,
+        которую в это же время пишет очередь, не даёт IntegrityError.
+        Коммит — за вызывающим.
+        """
+        statement = insert(User).values(
+            telegram_user_id=telegram_user_id,
+            username=username,
+        )
+        await self.session.execute(
+            statement.on_duplicate_key_update(
+                username=func.coalesce(
+                    statement.inserted.username,
+                    User.username,
+                ),
+            )
+        )
+
+        return await self.session.scalar(
+            select(User.id).where(User.telegram_user_id == telegram_user_id)
+        )
 
 
 class GroupManager(AsyncManager[Group]):
@@ -16,7 +43,32 @@ class GroupManager(AsyncManager[Group]):
 
 
 class CaptchaLogsManager(AsyncManager[CaptchaLogs]):
-    pass
+    async def verified_telegram_ids(self, group_id: int) -> set[int]:
+        """
+        telegram id всех, кому капча в группе не нужна:
+        прошедшие её и админы/владельцы — одним запросом
+        """
+        solved = (
+            select(User.telegram_user_id)
+            .join(CaptchaLogs, CaptchaLogs.user_id == User.id)
+            .where(
+                CaptchaLogs.group_id == group_id,
+                CaptchaLogs.status == CaptchaStatus.SOLVED,
+            )
+        )
+        admins = (
+            select(User.telegram_user_id)
+            .join(UserGroup, UserGroup.user_id == User.id)
+            .where(
+                UserGroup.group_id == group_id,
+                UserGroup.role.in_(
+                    (GroupUserRole.ADMIN, GroupUserRole.OWNER)
+                ),
+            )
+        )
+
+        result = await self.session.execute(union(solved, admins))
+        return set(result.scalars().all())
 
 
 class UserGroupManager(AsyncManager[UserGroup]):
@@ -29,7 +81,12 @@ class GroupSettingsManager(AsyncManager[GroupSettings]):
 
 
 class GroupBanwordsManager(AsyncManager[Banwords]):
-    pass
+    async def words(self, group_id: int) -> list[str]:
+        # search() пагинирует по 25 записей, здесь нужен весь список
+        result = await self.session.execute(
+            select(Banwords.word).where(Banwords.group_id == group_id)
+        )
+        return list(result.scalars().all())
 
 
 class PromocodeManager(AsyncManager[Promocode]):
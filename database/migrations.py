@@ -0,0 +1,37 @@
+from sqlalchemy import Column, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+from database.groups import GroupSettings
+
+
+# Колонки, добавленные в уже существующие таблицы. create_all создаёт
+# только новые таблицы, поэтому эти колонки добавляются при старте.
+# У каждой должен быть server_default — для строк, которые уже есть.
+ADDED_COLUMNS: tuple[Column, ...] = (
+    GroupSettings.__table__.c.ocr_profile,
+    GroupSettings.__table__.c.captcha_mode,
+)
+
+
+def add_missing_columns(connection: Connection) -> None:
+    """ALTER TABLE ... ADD COLUMN для колонок, которых нет в БД"""
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+
+    for column in ADDED_COLUMNS:
+        table = column.table
+        existing = {
+            info["name"] for info in inspector.get_columns(table.name)
+        }
+        if column.name in existing:
+            continue
+
+        definition = CreateColumn(column).compile(dialect=connection.dialect)
+        print(f"Миграция: добавляю колонку {table.name}.{column.name}")
+        connection.execute(
+            text(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {definition}"
+            )
+        )
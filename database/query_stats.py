@@ -0,0 +1,191 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from constants.db_constants import QUERY_BUDGET, QUERY_BUDGET_DB_TIME
+
+
+@dataclass(slots=True)
+class QueryUsage:
+    """Запросы одного апдейта (или блока assert_query_budget)"""
+
+    # хендлер, до которого дошёл апдейт; иначе тип события
+    name: str
+    queries: int = 0
+    db_time: float = 0.0
+    # тексты запросов — только если попросили (assert_query_budget)
+    statements: list[str] | None = None
+    # внешний счёт (assert_query_budget вокруг апдейта) — тоже растёт
+    parent: "QueryUsage | None" = field(default=None, repr=False)
+
+
+@dataclass(slots=True)
+class _HandlerTotals:
+    updates: int = 0
+    queries: int = 0
+    db_time: float = 0.0
+    max_queries: int = 0
+    over_budget: int = 0
+
+
+_usage: ContextVar[QueryUsage | None] = ContextVar("query_usage", default=None)
+
+
+def current_usage() -> QueryUsage | None:
+    return _usage.get()
+
+
+def _before_cursor_execute(
+    _conn: Any,
+    _cursor: Any,
+    _statement: str,
+    _parameters: Any,
+    context: Any,
+    _executemany: bool,
+) -> None:
+    context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    _conn: Any,
+    _cursor: Any,
+    statement: str,
+    _parameters: Any,
+    context: Any,
+    _executemany: bool,
+) -> None:
+    elapsed = time.perf_counter() - context.query_started
+
+    query_stats.queries += 1
+    query_stats.db_time += elapsed
+
+    # фоновые задачи (воркеры, membership_sync) — только в общем счёте
+    usage = _usage.get()
+    while usage is not None:
+        usage.queries += 1
+        usage.db_time += elapsed
+        if usage.statements is not None:
+            usage.statements.append(statement)
+        usage = usage.parent
+
+
+def instrument(engine: AsyncEngine) -> None:
+    """Считать запросы движка; вызывается один раз при старте"""
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        _before_cursor_execute,
+    )
+    event.listen(
+        engine.sync_engine,
+        "after_cursor_execute",
+        _after_cursor_execute,
+    )
+
+
+class QueryStats:
+    """
+    Число запросов и время в БД по хендлерам.
+
+    Апдейт, превысивший budget запросов или db_time секунд,
+    пишется в лог вместе с именем хендлера.
+    """
+
+    def __init__(self, budget: int, db_time: float):
+        self.budget = budget
+        self.slow_db_time = db_time
+
+        self._handlers: defaultdict[str, _HandlerTotals] = defaultdict(
+            _HandlerTotals
+        )
+
+        # все запросы процесса, включая фоновые
+        self.queries = 0
+        self.db_time = 0.0
+
+    @contextmanager
+    def track(self, name: str) -> Iterator[QueryUsage]:
+        """Привязать запросы текущей задачи к апдейту"""
+        usage = QueryUsage(name=name, parent=_usage.get())
+        token = _usage.set(usage)
+        try:
+            yield usage
+        finally:
+            _usage.reset(token)
+            self._record(usage)
+
+    def _record(self, usage: QueryUsage) -> None:
+        totals = self._handlers[usage.name]
+        totals.updates += 1
+        totals.queries += usage.queries
+        totals.db_time += usage.db_time
+        totals.max_queries = max(totals.max_queries, usage.queries)
+
+        if (
+            usage.queries > self.budget
+            or usage.db_time > self.slow_db_time
+        ):
+            totals.over_budget += 1
+            print(
+                f"Query budget: {usage.name} — {usage.queries} запросов "
+                f"(бюджет {self.budget}), {usage.db_time * 1000:.1f} мс в БД"
+            )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "db_time": round(self.db_time, 3),
+            "handlers": {
+                name: {
+                    "updates": totals.updates,
+                    "queries": totals.queries,
+                    "avg_queries": round(totals.queries / totals.updates, 2),
+                    "max_queries": totals.max_queries,
+                    "db_time": round(totals.db_time, 3),
+                    "over_budget": totals.over_budget,
+                }
+                for name, totals in self._handlers.items()
+            },
+        }
+
+
+query_stats = QueryStats(budget=QUERY_BUDGET, db_time=QUERY_BUDGET_DB_TIME)
+
+
+@contextmanager
+def assert_query_budget(
+    max_queries: int,
+    name: str = "assert_query_budget",
+) -> Iterator[QueryUsage]:
+    """
+    Проверка бюджета для тестов и отладки:
+
+        with assert_query_budget(2):
+            await handle(message)
+
+    Движок должен быть подключён через instrument(). Считаются и
+    запросы апдейтов внутри блока (dp.feed_update); при превышении —
+    AssertionError со списком запросов.
+    """
+    usage = QueryUsage(name=name, statements=[], parent=_usage.get())
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+    if usage.queries > max_queries:
+        listing = "\n".join(
+            f"  {i}. {statement}"
+            for i, statement in enumerate(usage.statements, 1)
+        )
+        raise AssertionError(
+            f"{name}: {usage.queries} запросов при бюджете {max_queries}\n"
+            f"{listing}"
+        )
@@ -1,24 +1,34 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
 from aiogram.enums import ChatType
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from constants.group_constants import GroupUserRole
 from constants.captcha_constants import CaptchaStatus
-from database.managers import (
-    GroupSettingsManager,
-    UserGroupManager,
-    UserManager,
-    GroupManager,
-    CaptchaLogsManager,
-)
+from database.managers import CaptchaLogsManager
+from middlewares.update_context import UpdateContext
+from moderation.verified_members import verified_members
+from queues.captcha_deadlines import captcha_deadlines
 
 
 class IsCaptchaEnabled(BaseFilter):
     async def __call__(
         self,
         message: Message,
-        session: AsyncSession,
+        update_context: UpdateContext,
+    ) -> bool:
+
+        # фильтр стоит и на ~IsCaptchaEnabled() — считаем один раз
+        if update_context.needs_captcha is None:
+            update_context.needs_captcha = await self._check(
+                message,
+                update_context,
+            )
+        return update_context.needs_captcha
+
+    async def _check(
+        self,
+        message: Message,
+        update_context: UpdateContext,
     ) -> bool:
 
         # 1️⃣ Только группы
@@ -35,62 +45,58 @@ class IsCaptchaEnabled(BaseFilter):
                 print("captcha_log", "добавление бота — пропускаем")
                 return False
 
-        # 3️⃣ Получаем группу
-        group = await GroupManager(session).get(
-            chat_id=message.chat.id
-        )
+        # 3️⃣ Группа и настройки — из кэша контекстов
+        context = await update_context.group()
 
-        if not group:
+        if not context:
             print("captcha_log", 'нет группы в бд')
             return False
 
-        # 4️⃣ Проверяем настройки
-        settings = await GroupSettingsManager(session).get(
-            group_id=group.id
-        )
-
-        if not settings:
-            print("captcha_log", 'нет настроек группы в бд')
-            return False
-
-        if not settings.captcha_enabled:
+        if not context.captcha_enabled:
             print("captcha_log", 'капча не включена')
             return False
 
-        # 5️⃣ Получаем пользователя
         if not message.from_user:
             return False
 
-        user = await UserManager(session).get(
-            telegram_user_id=message.from_user.id
-        )
+        # капча уже выдана — сообщение удалит captcha_send
+        if (message.chat.id, message.from_user.id) in captcha_deadlines:
+            return True
 
-        if not user:
+        # 4️⃣ Уже прошёл капчу или админ — без запросов в БД
+        if await update_context.is_verified():
             return False
 
-        user_group = await UserGroupManager(session).get(
-            user_id=user.id,
-            group_id=group.id,
-        )
+        # 5️⃣ Внутренний id и связь с группой — один раз на апдейт
+        user_id = await update_context.user_id()
+
+        # пользователь и связь пишутся пачками (membership_sync) и могут
+        # ещё не дойти до БД — новичок без записей капчу не проходил
+        if user_id is None:
+            return True
+
+        user_group = await update_context.user_group()
 
         if not user_group:
-            return False
+            return True
 
         if user_group.role in (
             GroupUserRole.ADMIN,
             GroupUserRole.OWNER,
         ):
             print("captcha_log", 'пользователь админ')
+            verified_members.add(message.chat.id, message.from_user.id)
             return False
 
-        captcha_log = await CaptchaLogsManager(session).get(
-            group_id=group.id,
-            user_id=user.id,
+        captcha_log = await CaptchaLogsManager(update_context.session).get(
+            group_id=context.group_id,
+            user_id=user_id,
             status=CaptchaStatus.SOLVED,
         )
 
         if captcha_log:
             print("captcha_log", 'пользователь уже решал капчу')
+            verified_members.add(message.chat.id, message.from_user.id)
             return False
 
         return True
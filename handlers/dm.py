@@ -1,13 +1,13 @@
 from aiogram import types, Bot, F
 from aiogram.filters import CommandStart, Command
 from aiogram.types import CallbackQuery
-from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import constants.text_constants
-from constants.group_constants import GroupType
+from constants.captcha_constants import CaptchaMode
+from constants.group_constants import GroupType, OcrProfile
 from database.groups import Banwords, Group
 from database.promocodes import Promocode
 from database.managers import (
@@ -16,6 +16,10 @@ from database.managers import (
 )
 import keyboards.dm_keyboards
 from bot import admin_user_id
+from moderation.group_context import group_contexts
+from moderation.normalization import normalize_banword
+from outgoing.bulk_delete import delete_messages_bulk
+from outgoing.dm_history import dm_history
 from states import DMFSM
 from routers import dm_router
 from utils import (
@@ -75,25 +79,16 @@ async def start(
 @dm_router.message(Command("clear"))
 async def cmd_clear(message: types.Message, bot: Bot):
     chat_id = message.chat.id
-    msg_id = message.message_id - 1
 
-    MAX_ERRORS = 5
-    MAX_ITER = 250
+    # удаляем только сообщения, которые точно были в этом чате
+    message_ids = [
+        msg_id
+        for msg_id in dm_history.pop(chat_id)
+        if msg_id != message.message_id
+    ]
+    dm_history.add(chat_id, message.message_id)
 
-    errors = 0
-    iterations = 0
-
-    while msg_id > 0 and iterations < MAX_ITER:
-        try:
-            await bot.delete_message(chat_id, msg_id)
-            errors = 0
-        except TelegramBadRequest:
-            errors += 1
-            if errors >= MAX_ERRORS:
-                break
-
-        msg_id -= 1
-        iterations += 1
+    await delete_messages_bulk(bot, chat_id, message_ids)
 
 
 # =========================
@@ -358,13 +353,26 @@ async def toggle_group_setting(
 
     if field == "captcha":
         settings.captcha_enabled = not settings.captcha_enabled
+    elif field == "captcha_mode":
+        settings.captcha_mode = (
+            CaptchaMode.IMAGE
+            if settings.captcha_mode == CaptchaMode.BUTTON
+            else CaptchaMode.BUTTON
+        )
     elif field == "photo":
         settings.photo_check_enabled = not settings.photo_check_enabled
+    elif field == "ocr":
+        profiles = list(OcrProfile)
+        settings.ocr_profile = profiles[
+            (profiles.index(settings.ocr_profile) + 1) % len(profiles)
+        ]
     else:
         await callback.answer("❌ Неизвестная настройка")
         return
 
     await session.commit()
+    group_contexts.invalidate_group(group_id)
+
     await open_settings_menu(
         callback=callback,
         session=session,
@@ -455,7 +463,12 @@ async def add_banword_finish(
     session: AsyncSession,
 ):
     data = await state.get_data()
-    word = message.text.strip().lower()
+    # храним как ввёл админ: нормализует BanwordMatcher при сборке
+    word = (message.text or "").strip().lower()
+
+    if not normalize_banword(word):
+        await message.answer("❌ В слове нет букв или цифр")
+        return
 
     try:
         await GroupBanwordsManager(session).create(
@@ -466,6 +479,8 @@ async def add_banword_finish(
         await message.answer("⚠️ Это слово уже есть")
         return
 
+    group_contexts.invalidate_group(data["group_id"])
+
     await redraw_banwords_menu(
         bot=message.bot,
         session=session,
@@ -493,10 +508,12 @@ async def delete_banword_finish(
     session: AsyncSession,
 ):
     data = await state.get_data()
-    word = message.text.strip().lower()
+    word = (message.text or "").strip().lower()
 
+    # часть слов хранилась в нормализованном виде
     pagination = await GroupBanwordsManager(session).search(
-        group_id=data["group_id"], word=word
+        Banwords.word.in_({word, normalize_banword(word)}),
+        group_id=data["group_id"],
     )
     if not pagination.items:
         await message.answer("❌ Слово не найдено")
@@ -505,6 +522,8 @@ async def delete_banword_finish(
     for item in pagination.items:
         await GroupBanwordsManager(session).delete(item)
 
+    group_contexts.invalidate_group(data["group_id"])
+
     await redraw_banwords_menu(
         bot=message.bot,
         session=session,
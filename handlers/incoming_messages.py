@@ -1,23 +1,30 @@
-import asyncio
+import time
 
-from aiogram.types import Message
+from aiogram.types import BufferedInputFile, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.captcha_logs import CaptchaLogs
 from database.managers import CaptchaLogsManager
 from aiogram.types import CallbackQuery
 from database.captcha_logs import CaptchaStatus
+from constants.captcha_constants import (
+    CAPTCHA_TIMEOUT,
+    SHARED_CAPTCHA_USER_ID,
+    CaptchaMode,
+)
 from utils import CaptchaCallbackData
 
-from database.managers import UserManager, GroupManager
+from database.managers import UserManager
 from filters.is_captcha_enabled import IsCaptchaEnabled
-from keyboards.group_keyboards import captcha_keyboard
+from middlewares.update_context import UpdateContext
+from keyboards.group_keyboards import captcha_keyboard, image_captcha_keyboard
+from queues.captcha_deadlines import PendingCaptcha, captcha_deadlines
+from queues.captcha_pool import captcha_images
+from moderation.raid_mode import raid_detector, shared_prompts
+from moderation.verified_members import verified_members
+from outgoing.scheduler import Priority, outbound_priority
 from routers import group_messages
 
 
-CAPTCHA_TIMEOUT = 30
-pending_captcha: dict[tuple[int, int], asyncio.Task] = {}
-
-
 @group_messages.edited_message()
 async def handle_group_edited_message(message: Message):
     pass
@@ -32,45 +39,85 @@ async def handle_group_message(message: Message):
 
 
 @group_messages.message(IsCaptchaEnabled())
-async def captcha_send(message: Message, session: AsyncSession):
+async def captcha_send(message: Message, update_context: UpdateContext):
 
     chat_id = message.chat.id
     user_id = message.from_user.id
-    key = (chat_id, user_id)
-
-    if key in pending_captcha:
-        await message.delete()
-        return
-
-    user_message_id = message.message_id
 
-    captcha_msg = await message.answer(
-        "👋 Подтвердите, что вы не бот\n"
-        "⏳ У вас 30 секунд",
-        reply_markup=captcha_keyboard(chat_id, user_id),
-        reply_to_message_id=user_message_id,
-    )
+    context = await update_context.group()
+    image_mode = bool(context and context.captcha_mode == CaptchaMode.IMAGE)
 
-    async def timeout():
-        await asyncio.sleep(CAPTCHA_TIMEOUT)
+    # дальше только Bot API: соединение не держим, пока ждём лимитов
+    await update_context.release()
 
-        if key in pending_captcha:
-            pending_captcha.pop(key, None)
+    if (chat_id, user_id) in captcha_deadlines:
+        if chat_id in shared_prompts:
+            shared_prompts.delete_later(chat_id, message.message_id)
+        else:
+            await message.delete()
+        return
 
-            # удаляем сообщение бота
-            try:
-                await captcha_msg.delete()
-            except Exception:
-                pass
+    user_message_id = message.message_id
 
-            # удаляем сообщение пользователя
-            try:
-                await message.bot.delete_message(chat_id, user_message_id)
-            except Exception:
-                pass
+    # 🚨 рейд: вместо отдельной капчи — место в общей
+    if raid_detector.record(chat_id):
+        answer = shared_prompts.add(chat_id, message.from_user, image_mode)
+        captcha_deadlines.add(
+            PendingCaptcha(
+                chat_id=chat_id,
+                user_id=user_id,
+                captcha_msg_id=0,
+                user_msg_id=user_message_id,
+                deadline=time.time() + CAPTCHA_TIMEOUT,
+                answer=answer,
+            )
+        )
+        return
 
-    task = asyncio.create_task(timeout())
-    pending_captcha[key] = task
+    image = None
+    if image_mode:
+        # пустой пул (сразу после старта) — обычная кнопка
+        image = captcha_images.take()
+
+    with outbound_priority(Priority.CAPTCHA):
+        if image is None:
+            captcha_msg = await message.answer(
+                "👋 Подтвердите, что вы не бот\n"
+                f"⏳ У вас {CAPTCHA_TIMEOUT} секунд",
+                reply_markup=captcha_keyboard(chat_id, user_id),
+                reply_to_message_id=user_message_id,
+            )
+        else:
+            captcha_msg = await message.answer_photo(
+                photo=(
+                    image.file_id
+                    or BufferedInputFile(image.png, "captcha.png")
+                ),
+                caption=(
+                    "👋 Выберите код с картинки\n"
+                    f"⏳ У вас {CAPTCHA_TIMEOUT} секунд"
+                ),
+                reply_markup=image_captcha_keyboard(
+                    chat_id,
+                    user_id,
+                    image.answer,
+                ),
+                reply_to_message_id=user_message_id,
+            )
+            if image.file_id is None:
+                image.file_id = captcha_msg.photo[-1].file_id
+
+    # по таймауту оба сообщения удалит captcha_deadlines
+    captcha_deadlines.add(
+        PendingCaptcha(
+            chat_id=chat_id,
+            user_id=user_id,
+            captcha_msg_id=captcha_msg.message_id,
+            user_msg_id=user_message_id,
+            deadline=time.time() + CAPTCHA_TIMEOUT,
+            answer=image.answer if image else 0,
+        )
+    )
 
 
 @group_messages.callback_query(CaptchaCallbackData.filter())
@@ -78,41 +125,72 @@ async def captcha_confirm(
     callback: CallbackQuery,
     callback_data: CaptchaCallbackData,
     session: AsyncSession,
+    update_context: UpdateContext,
 ):
 
-    if callback.from_user.id != callback_data.telegram_user_id:
+    shared = callback_data.telegram_user_id == SHARED_CAPTCHA_USER_ID
+
+    if not shared and callback.from_user.id != callback_data.telegram_user_id:
         await callback.answer("❌ Это не для вас", show_alert=True)
         return
 
-    key = (callback_data.chat_id, callback_data.telegram_user_id)
+    pending = captcha_deadlines.get(
+        callback_data.chat_id,
+        callback.from_user.id,
+    )
 
-    task = pending_captcha.pop(key, None)
-    if task:
-        task.cancel()
+    # callback_data приходит от клиента: засчитывается только кнопка
+    # той капчи, которую пользователь действительно ждёт
+    # (captcha_msg_id == 0 — место в общей капче рейда)
+    if pending is None:
+        await callback.answer(
+            "❌ Это не для вас" if shared else "❌ Капча истекла",
+            show_alert=True,
+        )
+        return
 
-    await callback.message.delete()
+    if shared != (pending.captcha_msg_id == 0):
+        await callback.answer("❌ Это не для вас", show_alert=True)
+        return
 
-    user = await UserManager(session).get(
-        telegram_user_id=callback_data.telegram_user_id,
-    )
+    captcha_deadlines.pop(callback_data.chat_id, callback.from_user.id)
 
-    group = await GroupManager(session).get(
-        chat_id=callback_data.chat_id,
-    )
+    if pending.answer != callback_data.answer:
+        # неверный код — как истёкшая капча
+        await captcha_deadlines.expire([pending])
+        await callback.answer("❌ Неверный код", show_alert=True)
+        return
+
+    if not shared:
+        # общая капча остаётся для остальных
+        await callback.message.delete()
+
+    # кнопка в сообщении группы: чат апдейта — callback_data.chat_id
+    context = await update_context.group()
+    user_id = await update_context.user_id()
 
-    if not user:
-        await callback.answer("❌ Пользователь не найден")
+    if context is None:
+        await callback.answer("❌ Группа не найдена")
         return
 
+    if user_id is None:
+        # запись могла ещё не дойти из membership_sync
+        user_id = await UserManager(session).upsert(
+            callback.from_user.id,
+            callback.from_user.username,
+        )
+
     # создаём лог прохождения
     await CaptchaLogsManager(session).create(
         CaptchaLogs(
-            group_id=group.id,
-            user_id=user.id,
+            group_id=context.group_id,
+            user_id=user_id,
             status=CaptchaStatus.SOLVED,
         )
     )
 
     await session.commit()
 
+    verified_members.add(callback_data.chat_id, callback.from_user.id)
+
     await callback.answer("✅ Теперь можно писать")
@@ -0,0 +1,142 @@
+import time
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import BufferedInputFile, CallbackQuery, ChatJoinRequest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from constants.captcha_constants import (
+    JOIN_REQUEST_TIMEOUT,
+    CaptchaMode,
+    CaptchaStatus,
+)
+from database.captcha_logs import CaptchaLogs
+from database.managers import CaptchaLogsManager, UserManager
+from database.identity_map import user_ids
+from keyboards.group_keyboards import join_captcha_keyboard
+from middlewares.update_context import UpdateContext
+from moderation.group_context import group_contexts
+from moderation.verified_members import verified_members
+from outgoing.scheduler import Priority, outbound_priority
+from queues.captcha_pool import captcha_images
+from queues.join_requests import PendingJoin, join_requests
+from routers import join_requests_router
+from utils import JoinCaptchaCallbackData
+
+
+@join_requests_router.chat_join_request()
+async def on_join_request(
+    event: ChatJoinRequest,
+    update_context: UpdateContext,
+):
+    chat_id = event.chat.id
+    user_id = event.from_user.id
+
+    context = await update_context.group()
+
+    # капча выключена — заявки рассматривают админы
+    if not context or not context.captcha_enabled:
+        return
+
+    if (chat_id, user_id) in join_requests:
+        return
+
+    if await update_context.is_verified():
+        join_requests.approve(chat_id, user_id)
+        return
+
+    # дальше только Bot API: соединение не держим, пока ждём лимитов
+    await update_context.release()
+
+    image = None
+    if context.captcha_mode == CaptchaMode.IMAGE:
+        image = captcha_images.take()
+
+    task = "Выберите код с картинки" if image else "Подтвердите, что вы не бот"
+    text = (
+        f"👋 Вы подали заявку в «{event.chat.title}»\n"
+        f"{task}\n"
+        f"⏳ У вас {JOIN_REQUEST_TIMEOUT} секунд"
+    )
+
+    try:
+        with outbound_priority(Priority.CAPTCHA):
+            if image is None:
+                await event.bot.send_message(
+                    event.user_chat_id,
+                    text,
+                    reply_markup=join_captcha_keyboard(chat_id),
+                )
+            else:
+                dm = await event.bot.send_photo(
+                    event.user_chat_id,
+                    photo=(
+                        image.file_id
+                        or BufferedInputFile(image.png, "captcha.png")
+                    ),
+                    caption=text,
+                    reply_markup=join_captcha_keyboard(chat_id, image.answer),
+                )
+                if image.file_id is None:
+                    image.file_id = dm.photo[-1].file_id
+    except (TelegramBadRequest, TelegramForbiddenError) as e:
+        # написать в личку не вышло — заявка остаётся админам
+        print(f"Не удалось отправить капчу по заявке {user_id}: {e}")
+        return
+
+    join_requests.add(
+        PendingJoin(
+            chat_id=chat_id,
+            user_id=user_id,
+            deadline=time.time() + JOIN_REQUEST_TIMEOUT,
+            answer=image.answer if image else 0,
+        )
+    )
+
+
+@join_requests_router.callback_query(JoinCaptchaCallbackData.filter())
+async def join_captcha_confirm(
+    callback: CallbackQuery,
+    callback_data: JoinCaptchaCallbackData,
+    session: AsyncSession,
+):
+    chat_id = callback_data.chat_id
+    user_id = callback.from_user.id
+
+    pending = join_requests.pop(chat_id, user_id)
+    if pending is None:
+        await callback.answer("⌛ Заявка уже обработана", show_alert=True)
+        return
+
+    await callback.message.delete()
+
+    if pending.answer != callback_data.answer:
+        join_requests.decline(chat_id, user_id)
+        await callback.answer("❌ Неверный код, заявка отклонена", show_alert=True)
+        return
+
+    context = await group_contexts.get(session, chat_id)
+
+    # запись могла ещё не дойти из membership_sync — upsert без гонки
+    db_user_id = await user_ids.resolve(session, user_id)
+    if db_user_id is None:
+        db_user_id = await UserManager(session).upsert(
+            user_id,
+            callback.from_user.username,
+        )
+
+    if context:
+        # лог прохождения: в группе капча больше не понадобится
+        await CaptchaLogsManager(session).create(
+            CaptchaLogs(
+                group_id=context.group_id,
+                user_id=db_user_id,
+                status=CaptchaStatus.SOLVED,
+            )
+        )
+        verified_members.add(chat_id, user_id)
+
+    await session.commit()
+
+    join_requests.approve(chat_id, user_id)
+
+    await callback.answer("✅ Заявка одобрена, добро пожаловать")
@@ -4,14 +4,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from routers import update_users_rights
 from database.users_groups import UserGroup
+from database.identity_map import user_ids
 from database.managers import GroupManager, UserManager, UserGroupManager
 from constants.group_constants import GroupUserRole
+from middlewares.update_context import UpdateContext
+from moderation.group_context import group_contexts
+from moderation.raid_mode import raid_detector
+from moderation.verified_members import verified_members
+from queues.membership_sync import membership_sync
 
 
 @update_users_rights.chat_member()
 async def update_admins_handler(
     event: ChatMemberUpdated,
     session: AsyncSession,
+    update_context: UpdateContext,
 ):
     group_manager = GroupManager(session)
     user_manager = UserManager(session)
@@ -26,21 +33,41 @@ async def update_admins_handler(
     if tg_user.is_bot:
         return
 
+    # вступления считаются в окне рейда вместе с первыми сообщениями
+    if (
+        old_status in {ChatMemberStatus.LEFT, ChatMemberStatus.KICKED}
+        and new_status in {
+            ChatMemberStatus.MEMBER,
+            ChatMemberStatus.RESTRICTED,
+        }
+    ):
+        raid_detector.record(chat.id)
+
     # --- группа ---
-    group, _ = await group_manager.get_or_create(
-        chat_id=chat.id
-    )
+    context = await update_context.group()
+    group_id = context.group_id if context else None
+    if group_id is None:
+        group, group_created = await group_manager.get_or_create(
+            chat_id=chat.id
+        )
+        if group_created:
+            group_contexts.invalidate_chat(chat.id)
+        group_id = group.id
 
     # --- пользователь ---
-    user, _ = await user_manager.get_or_create(
-        telegram_user_id=tg_user.id,
-        username=tg_user.username,
-    )
+    # (в update_context автор апдейта — тот, кто менял статус)
+    user_id = await user_ids.resolve(session, tg_user.id)
+    if user_id is None:
+        user, _ = await user_manager.get_or_create(
+            telegram_user_id=tg_user.id,
+            username=tg_user.username,
+        )
+        user_id = user.id
 
     # --- связь пользователь–группа ---
     user_group = await user_group_manager.get(
-        user_id=user.id,
-        group_id=group.id,
+        user_id=user_id,
+        group_id=group_id,
     )
 
     # === ПОЛЬЗОВАТЕЛЬ ВЫШЕЛ / КИКНУТ ===
@@ -52,14 +79,16 @@ async def update_admins_handler(
             await user_group_manager.delete(user_group)
 
         await session.commit()
+        verified_members.discard(chat.id, tg_user.id)
+        membership_sync.forget(tg_user.id, chat.id)
         return
 
     # === ЕСЛИ СВЯЗИ НЕТ — СОЗДАЁМ (по умолчанию MEMBER) ===
     if user_group is None:
         user_group = await user_group_manager.create(
             UserGroup(
-                user_id=user.id,
-                group_id=group.id,
+                user_id=user_id,
+                group_id=group_id,
                 role=GroupUserRole.MEMBER,
             ),
         )
@@ -77,6 +106,7 @@ async def update_admins_handler(
                 user_group,
                 role=GroupUserRole.ADMIN,
             )
+        verified_members.add(chat.id, tg_user.id)
 
     # === СНЯЛИ АДМИНКУ ===
     elif (
@@ -91,5 +121,7 @@ async def update_admins_handler(
                 user_group,
                 role=GroupUserRole.MEMBER,
             )
+        # мог и не проходить капчу — пусть фильтр проверит по БД
+        verified_members.discard(chat.id, tg_user.id)
 
     await session.commit()
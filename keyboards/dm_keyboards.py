@@ -8,11 +8,12 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.filters.callback_data import CallbackData
 import dotenv
 
-from constants.group_constants import GroupUserRole
+from constants.captcha_constants import CaptchaMode
+from constants.group_constants import GroupUserRole, OcrProfile
+from database.identity_map import user_ids
 from database.managers import (
     GroupBanwordsManager,
     UserGroupManager,
-    UserManager,
     GroupSettingsManager,
 )
 from utils import get_group_name
@@ -22,6 +23,19 @@ from bot import admin_user_id
 dotenv.load_dotenv()
 
 
+OCR_PROFILE_TITLES = {
+    OcrProfile.RAW: "без обработки",
+    OcrProfile.FAST: "быстрый",
+    OcrProfile.ACCURATE: "точный",
+}
+
+
+CAPTCHA_MODE_TITLES = {
+    CaptchaMode.BUTTON: "кнопка",
+    CaptchaMode.IMAGE: "картинка",
+}
+
+
 class PageCallback(CallbackData, prefix="page"):
     page: int
 
@@ -50,15 +64,14 @@ async def get_paginated_kb(
 ) -> InlineKeyboardMarkup | None:
     builder = InlineKeyboardBuilder()
 
-    user_manager = UserManager(session)
     user_group_manager = UserGroupManager(session)
 
-    user = await user_manager.get(telegram_user_id=telegram_user_id)
-    if not user:
+    user_id = await user_ids.resolve(session, telegram_user_id)
+    if user_id is None:
         return None
 
     pagination = await user_group_manager.search(
-        user_id=user.id,
+        user_id=user_id,
         role=GroupUserRole.ADMIN,
         page=page + 1,
     )
@@ -181,6 +194,11 @@ async def settings_keyboard(session, group_id: int):
         callback_data=f"toggle:captcha:{group_id}",
     )
 
+    builder.button(
+        text=f"🖼 Тип капчи: {CAPTCHA_MODE_TITLES[settings.captcha_mode]}",
+        callback_data=f"toggle:captcha_mode:{group_id}",
+    )
+
     builder.button(
         text=f"""
         📸 Фото-проверка: {'ON' if settings.photo_check_enabled else 'OFF'}
@@ -188,6 +206,11 @@ async def settings_keyboard(session, group_id: int):
         callback_data=f"toggle:photo:{group_id}",
     )
 
+    builder.button(
+        text=f"🔍 OCR: {OCR_PROFILE_TITLES[settings.ocr_profile]}",
+        callback_data=f"toggle:ocr:{group_id}",
+    )
+
     builder.button(
         text="🚫 Бан-слова",
         callback_data=f"banwords:{group_id}",
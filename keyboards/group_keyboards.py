@@ -1,9 +1,16 @@
+import random
+
 from aiogram.types import (
     InlineKeyboardButton,
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from utils import CaptchaCallbackData
+from constants.captcha_constants import (
+    CAPTCHA_IMAGE_OPTIONS,
+    SHARED_CAPTCHA_USER_ID,
+)
+from moderation.captcha_render import random_code
+from utils import CaptchaCallbackData, JoinCaptchaCallbackData
 
 
 def captcha_keyboard(chat_id, user_id):
@@ -20,3 +27,61 @@ def captcha_keyboard(chat_id, user_id):
     )
 
     return _builder.as_markup()
+
+
+def shared_captcha_keyboard(chat_id, answer=0):
+    """Общая капча рейда: кнопка или варианты кода с картинки"""
+    if answer:
+        return image_captcha_keyboard(chat_id, SHARED_CAPTCHA_USER_ID, answer)
+    return captcha_keyboard(chat_id, SHARED_CAPTCHA_USER_ID)
+
+
+def _answer_options(answer):
+    options = {answer}
+    while len(options) < CAPTCHA_IMAGE_OPTIONS:
+        options.add(int(random_code()))
+
+    options = list(options)
+    random.shuffle(options)
+    return options
+
+
+def image_captcha_keyboard(chat_id, user_id, answer):
+    _builder = InlineKeyboardBuilder()
+
+    for option in _answer_options(answer):
+        _builder.button(
+            text=str(option),
+            callback_data=CaptchaCallbackData(
+                chat_id=chat_id,
+                telegram_user_id=user_id,
+                answer=option,
+            ),
+        )
+
+    _builder.adjust(CAPTCHA_IMAGE_OPTIONS)
+    return _builder.as_markup()
+
+
+def join_captcha_keyboard(chat_id, answer=0):
+    """Капча в личке по заявке: кнопка или варианты кода"""
+    _builder = InlineKeyboardBuilder()
+
+    if not answer:
+        _builder.button(
+            text="Я не бот💛",
+            callback_data=JoinCaptchaCallbackData(chat_id=chat_id),
+        )
+        return _builder.as_markup()
+
+    for option in _answer_options(answer):
+        _builder.button(
+            text=str(option),
+            callback_data=JoinCaptchaCallbackData(
+                chat_id=chat_id,
+                answer=option,
+            ),
+        )
+
+    _builder.adjust(CAPTCHA_IMAGE_OPTIONS)
+    return _builder.as_markup()
@@ -1,18 +1,43 @@
 import asyncio
 from zoneinfo import ZoneInfo
 
+from aiogram import Dispatcher
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from bot import bot, dp, engine, session_maker
 import database.base
+from database.migrations import add_missing_columns
+from database.query_stats import instrument
 from handlers.dm import dm_router
 from handlers.bot_added_to_group import on_bot_added_to_group_router
 from handlers.update_admins import update_users_rights
 from handlers.incoming_messages import group_messages
+from handlers.join_requests import join_requests_router
 from middlewares.banwrods_middleware import BanwordsMiddleware
 from middlewares.sync_users import SyncUsersMiddleware
 from middlewares.db_connection import DbSessionMiddleware
-from queues.workers import group_admins_worker
+from middlewares.query_budget import (
+    HandlerNameMiddleware,
+    QueryBudgetMiddleware,
+)
+from middlewares.dm_history import DmHistoryMiddleware
+from middlewares.update_context import UpdateContextMiddleware
+from outgoing.dm_history import DmHistoryRequestMiddleware
+from outgoing.scheduler import outbound
+from constants.moderation_constants import (
+    MODERATION_ASYNC_PHOTO_SCAN,
+    MODERATION_WORKERS,
+)
+from moderation.image_engine import image_engine
+from moderation.verdict_cache import photo_verdicts
+from queues.captcha_deadlines import captcha_deadlines
+from queues.captcha_store import captcha_store
+from queues.captcha_pool import captcha_images
+from queues.join_requests import join_requests
+from queues.membership_sync import membership_sync
+from moderation.raid_mode import shared_prompts
+from queues.workers import group_admins_worker, moderation_worker
 from payments_schedule.job import check_daily_payments
 
 
@@ -21,12 +46,19 @@ scheduler = AsyncIOScheduler(
 )
 
 
-async def start():
-
-    async with engine.begin() as conn:
-        await conn.run_sync(database.base.Base.metadata.create_all)
+def setup_dispatcher(
+    dp: Dispatcher,
+    session_pool: async_sessionmaker,
+) -> None:
+    """Middlewares и роутеры; отдельно — чтобы тесты собирали тот же dp"""
+    dp.update.middleware(QueryBudgetMiddleware())
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(HandlerNameMiddleware())
 
-    dp.update.middleware(DbSessionMiddleware(session_pool=session_maker))
+    dp.update.middleware(DbSessionMiddleware(session_pool=session_pool))
+    dp.update.middleware(UpdateContextMiddleware())
+    dm_router.message.outer_middleware(DmHistoryMiddleware())
     group_messages.message.middleware(BanwordsMiddleware())
     group_messages.edited_message.middleware(BanwordsMiddleware())
     group_messages.message.middleware(SyncUsersMiddleware())
@@ -36,12 +68,32 @@ async def start():
         group_messages,
         on_bot_added_to_group_router,
         update_users_rights,
+        join_requests_router,
     )
 
+
+async def start():
+
+    async with engine.begin() as conn:
+        await conn.run_sync(database.base.Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+
+    bot.session.middleware(DmHistoryRequestMiddleware())
+    # все запросы к Bot API — через общие лимиты и очередь
+    bot.session.middleware(outbound)
+
+    # счёт запросов к БД по апдейтам и хендлерам
+    instrument(engine)
+    setup_dispatcher(dp, session_maker)
+
     asyncio.create_task(
         group_admins_worker(bot),
     )
 
+    if MODERATION_ASYNC_PHOTO_SCAN:
+        for _ in range(MODERATION_WORKERS):
+            asyncio.create_task(moderation_worker())
+
     scheduler.add_job(
         check_daily_payments,
         trigger="cron",
@@ -51,11 +103,27 @@ async def start():
     )
 
     scheduler.start()
+    captcha_store.open()
+    captcha_deadlines.start(bot)
+    shared_prompts.start(bot)
+    captcha_images.start()
+    join_requests.start(bot)
+    membership_sync.start()
+    image_engine.start()
+    photo_verdicts.open()
 
     try:
         await dp.start_polling(bot)
     finally:
         scheduler.shutdown(wait=False)
+        await shared_prompts.stop()
+        await captcha_images.stop()
+        await join_requests.stop()
+        await membership_sync.stop()
+        await captcha_deadlines.stop()
+        captcha_store.close()
+        image_engine.shutdown()
+        photo_verdicts.close()
         await engine.dispose()
 
 
@@ -1,46 +1,14 @@
-import re
-import asyncio
-from io import BytesIO
 from typing import Callable, Awaitable, Dict, Any
 
-import numpy as np
-import cv2
-from PIL import Image
-import pytesseract
-
 from aiogram import BaseMiddleware
 from aiogram.types import Message
 from aiogram.enums import ChatType
 
-from constants.group_constants import GroupType
-from bot import qr_detector
-from database.managers import (
-    GroupBanwordsManager,
-    GroupManager,
-    GroupSettingsManager,
-)
-
-
-def normalize(text: str) -> list[str]:
-    return re.findall(r"[a-zа-яё0-9]+", text.lower())
-
-
-def detect_qr(image_bytes: bytes) -> bool:
-    """Проверяет, есть ли QR-код на изображении"""
-    np_array = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(np_array, cv2.IMREAD_COLOR)
-
-    data, bbox, _ = qr_detector.detectAndDecode(img)
-    return bool(bbox is not None and data)
-
-
-def extract_text_tesseract(image_bytes: bytes) -> str:
-    """OCR через Tesseract"""
-    image = Image.open(BytesIO(image_bytes))
-
-    # lang можно расширить при необходимости
-    text = pytesseract.image_to_string(image, lang="rus+eng")
-    return text
+from constants.moderation_constants import MODERATION_ASYNC_PHOTO_SCAN
+from moderation.album_collector import album_collector
+from moderation.normalization import normalize
+from moderation.media_scanner import has_scannable_media, media_violates
+from queues.moderation_queue import ModerationJob, moderation_queue
 
 
 class BanwordsMiddleware(BaseMiddleware):
@@ -59,67 +27,54 @@ class BanwordsMiddleware(BaseMiddleware):
             print("BanwordsMiddleware: канал или отправлено от имени чата, пропускаем")
             return
 
-        session = data.get("session")
-        if not session:
-            print("BanwordsMiddleware: нет сессии в данных, пропускаем")
+        update_context = data.get("update_context")
+        if not update_context:
+            print("BanwordsMiddleware: нет контекста апдейта, пропускаем")
             return await handler(event, data)
 
-        group = await GroupManager(session).get(chat_id=event.chat.id)
-        if not group or group.subscription_type != GroupType.PAID:
+        context = await update_context.group()
+        if not context or not context.is_paid:
             print("BanwordsMiddleware: группа не подписанна, пропускаем")
             return await handler(event, data)
 
-        group_settings = await GroupSettingsManager(session).get(
-            group_id=group.id,
-        )
-
-        banwords_result = await GroupBanwordsManager(session).search(
-            group_id=group.id
-        )
-
-        if not banwords_result.items:
+        matcher = context.matcher
+        if not matcher:
             print("BanwordsMiddleware: нет слов для проверки, пропускаем")
             return await handler(event, data)
 
-        banwords = [bw.word.lower() for bw in banwords_result.items]
-        print(f"BanwordsMiddleware: проверяем сообщение {event.message_id} в группе {event.chat.id} на слова {banwords}")
+        # альбом проверяется целиком, когда придут все его элементы
+        if event.media_group_id:
+            album_collector.add(event, context)
+            return await handler(event, data)
+
+        print(f"BanwordsMiddleware: проверяем сообщение {event.message_id} в группе {event.chat.id} на {len(matcher)} слов")
+        # удаление ждёт очередь Bot API, OCR — пул процессов:
+        # соединение на это время не держим
+        await update_context.release()
         # =====================
         # 1️⃣ Проверка текста
         # =====================
         text = event.text or event.caption
         if text:
             print("Text:", text)
-            words = normalize(text)
-            if any(bw in words for bw in banwords):
+            if matcher.search(normalize(text)):
                 await event.delete()
                 return
         print("Текстовая проверка пройдена")
         # =====================
-        # 2️⃣ Проверка фото
+        # 2️⃣ Проверка фото, GIF, видео и стикеров
         # =====================
-        if event.photo and group_settings.photo_check_enabled:
+        if has_scannable_media(event) and context.photo_check_enabled:
             print("Photo check enabled")
-            try:
-                photo = event.photo[-1]
-                file = await event.bot.get_file(photo.file_id)
-                file_stream = await event.bot.download_file(file.file_path)
-                image_bytes = file_stream.read()
-                print("Image downloaded, size:", len(image_bytes))
-                # 🔥 2.1 QR
-                has_qr = await asyncio.to_thread(detect_qr, image_bytes)
-                if has_qr:
-                    print("QR detected")
-                    await event.delete()
-                    return
-                # 🔥 2.2 OCR (Tesseract)
-                extracted_text = await asyncio.to_thread(
-                    extract_text_tesseract,
-                    image_bytes,
-                )
-                print("Text extracted:", extracted_text)
 
-                words = normalize(extracted_text)
-                if any(bw in words for bw in banwords):
+            # медиа проверяется в фоне, хендлеры не ждут OCR
+            if MODERATION_ASYNC_PHOTO_SCAN:
+                if not moderation_queue.submit(ModerationJob(event, context)):
+                    print("BanwordsMiddleware: очередь модерации переполнена")
+                return await handler(event, data)
+
+            try:
+                if await media_violates(event, context):
                     await event.delete()
                     return
 
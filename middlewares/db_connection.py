@@ -1,3 +1,4 @@
+from collections import Counter
 from typing import (
     Any,
     Awaitable,
@@ -5,14 +6,63 @@ from typing import (
     Dict,
 )
 
-from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from aiogram.types import TelegramObject, Update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+class LazySession:
+    """
+    AsyncSession, которая создаётся при первом обращении.
+
+    Апдейты, которым хватило кэшей (контексты групп, проверенные
+    участники), не создают сессию и не берут соединение из пула.
+    Менеджеры и хендлеры работают с ней как с обычной AsyncSession.
+
+    release() закрывает сессию посреди апдейта: транзакция, начатая
+    первым запросом, держит соединение из пула до закрытия, а после
+    чтений апдейт часто ждёт очередь Bot API (лимит чата — 20 в минуту).
+    Следующее обращение создаст новую сессию.
+    """
+
+    __slots__ = ("_factory", "_session", "_used")
+
+    def __init__(self, factory: async_sessionmaker) -> None:
+        self._factory = factory
+        self._session: AsyncSession | None = None
+        self._used = False
+
+    @property
+    def used(self) -> bool:
+        return self._used
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+            self._used = True
+        return getattr(self._session, name)
+
+    async def release(self) -> None:
+        """
+        Вернуть соединение в пул. Незакоммиченное откатывается,
+        загруженные объекты остаются в памяти (отсоединёнными).
+        """
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def close(self) -> None:
+        await self.release()
 
 
 class DbSessionMiddleware:
     def __init__(self, session_pool: async_sessionmaker) -> None:
         self.session_pool = session_pool
 
+        self.updates = 0
+        self.db_updates = 0
+        # апдейты без обращения к БД по типу события
+        self.db_free: Counter[str] = Counter()
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
@@ -20,7 +70,24 @@ class DbSessionMiddleware:
         data: Dict[str, Any],
     ):
 
-        async with self.session_pool() as session:
-            data["session"] = session
+        session = LazySession(self.session_pool)
+        data["session"] = session
 
+        try:
             return await handler(event, data)
+        finally:
+            await session.close()
+
+            self.updates += 1
+            if session.used:
+                self.db_updates += 1
+            elif isinstance(event, Update):
+                self.db_free[event.event_type] += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "updates": self.updates,
+            "db_updates": self.db_updates,
+            "db_free_updates": self.updates - self.db_updates,
+            "db_free_by_type": dict(self.db_free),
+        }
@@ -0,0 +1,23 @@
+from typing import Callable, Awaitable, Dict, Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+from aiogram.enums import ChatType
+
+from outgoing.dm_history import dm_history
+
+
+class DmHistoryMiddleware(BaseMiddleware):
+    """Запоминает входящие сообщения в личке для /clear"""
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any],
+    ) -> Any:
+
+        if isinstance(event, Message) and event.chat.type == ChatType.PRIVATE:
+            dm_history.add(event.chat.id, event.message_id)
+
+        return await handler(event, data)
@@ -0,0 +1,51 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from database.query_stats import current_usage, query_stats
+
+
+class QueryBudgetMiddleware(BaseMiddleware):
+    """
+    Считает запросы к БД за апдейт (database.query_stats).
+
+    Регистрируется на dp.update до DbSessionMiddleware, чтобы
+    закрытие сессии тоже попало в апдейт.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+
+        name = event.event_type if isinstance(event, Update) else "unknown"
+
+        with query_stats.track(name):
+            return await handler(event, data)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """
+    Подписывает счёт апдейта именем хендлера.
+
+    Внутренний middleware: вызывается, когда хендлер уже выбран.
+    На роутере-родителе действует и на вложенные роутеры.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+
+        usage = current_usage()
+        handler_object = data.get("handler")
+
+        if usage is not None and handler_object is not None:
+            usage.name = handler_object.callback.__name__
+
+        return await handler(event, data)
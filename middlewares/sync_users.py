@@ -4,15 +4,17 @@ from aiogram import BaseMiddleware
 from aiogram.types import Message
 from aiogram.enums import ChatType
 
-from database.users import User
-from database.managers import (
-    UserManager,
-    UserGroupManager,
-    GroupManager,
-)
+from queues.membership_sync import membership_sync
 
 
 class SyncUsersMiddleware(BaseMiddleware):
+    """
+    Отмечает автора сообщения участником группы.
+
+    В БД ничего не пишется: наблюдение уходит в membership_sync,
+    который пишет пользователей и связи пачками.
+    """
+
     async def __call__(
         self,
         handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
@@ -29,28 +31,10 @@ class SyncUsersMiddleware(BaseMiddleware):
         ):
             return
 
-        session = data["session"]
-
-        user = await UserManager(session).get(
-            telegram_user_id=event.from_user.id
-        )
-
-        if not user:
-            user = await UserManager(session).create(
-                User(
-                    telegram_user_id=event.from_user.id,
-                    username=event.from_user.username,
-                ),
-            )
-
-        group = await GroupManager(session).get(
+        membership_sync.observe(
+            telegram_user_id=event.from_user.id,
             chat_id=event.chat.id,
+            username=event.from_user.username,
         )
 
-        if group:
-            await UserGroupManager(session).get_or_create(
-                user_id=user.id,
-                group_id=group.id,
-            )
-
         return await handler(event, data)
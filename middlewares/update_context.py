@@ -0,0 +1,132 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, TelegramObject, User
+from database.identity_map import user_ids
+from database.managers import UserGroupManager
+from database.users_groups import UserGroup
+from middlewares.db_connection import LazySession
+from moderation.group_context import GroupContext, group_contexts
+from moderation.verified_members import verified_members
+
+
+_UNSET: Any = object()
+
+
+class UpdateContext:
+    """
+    Группа, пользователь и его членство для одного апдейта.
+
+    Всё грузится при первом обращении и запоминается до конца апдейта,
+    поэтому middlewares, фильтры и хендлеры, читающие одно и то же
+    из data["update_context"], вместе делают по одному запросу.
+    Чат и пользователь — из апдейта (event_chat / event_from_user).
+    """
+
+    __slots__ = (
+        "session",
+        "chat_id",
+        "telegram_user_id",
+        "_group",
+        "_user_id",
+        "_user_group",
+        "_verified",
+        "needs_captcha",
+    )
+
+    def __init__(
+        self,
+        session: LazySession,
+        chat_id: int | None,
+        telegram_user_id: int | None,
+    ) -> None:
+        self.session = session
+        self.chat_id = chat_id
+        self.telegram_user_id = telegram_user_id
+
+        self._group: GroupContext | None = _UNSET
+        self._user_id: int | None = _UNSET
+        self._user_group: UserGroup | None = _UNSET
+        self._verified: bool = _UNSET
+        # результат IsCaptchaEnabled: фильтр стоит на двух хендлерах
+        self.needs_captcha: bool | None = None
+
+    async def group(self) -> GroupContext | None:
+        """Снимок группы с настройками (group_contexts)"""
+        if self._group is _UNSET:
+            self._group = (
+                await group_contexts.get(self.session, self.chat_id)
+                if self.chat_id is not None
+                else None
+            )
+        return self._group
+
+    async def user_id(self) -> int | None:
+        """users.id автора апдейта (карта идентификаторов)"""
+        if self._user_id is _UNSET:
+            self._user_id = (
+                await user_ids.resolve(self.session, self.telegram_user_id)
+                if self.telegram_user_id is not None
+                else None
+            )
+        return self._user_id
+
+    async def user_group(self) -> UserGroup | None:
+        """Связь автора с группой или None"""
+        if self._user_group is _UNSET:
+            group = await self.group()
+            user_id = await self.user_id()
+
+            self._user_group = None
+            if group is not None and user_id is not None:
+                self._user_group = await UserGroupManager(self.session).get(
+                    user_id=user_id,
+                    group_id=group.group_id,
+                )
+        return self._user_group
+
+    async def release(self) -> None:
+        """
+        Чтения закончены: соединение — обратно в пул, до запросов
+        к Bot API. Загруженное выше остаётся запомненным.
+        """
+        await self.session.release()
+
+    async def is_verified(self) -> bool:
+        """Прошёл капчу или админ (verified_members)"""
+        if self._verified is _UNSET:
+            group = await self.group()
+
+            self._verified = bool(
+                group is not None
+                and self.telegram_user_id is not None
+                and await verified_members.is_verified(
+                    self.session,
+                    self.chat_id,
+                    group.group_id,
+                    self.telegram_user_id,
+                )
+            )
+        return self._verified
+
+
+class UpdateContextMiddleware(BaseMiddleware):
+    """Кладёт UpdateContext апдейта в data; регистрируется после сессии"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+
+        chat: Chat | None = data.get("event_chat")
+        user: User | None = data.get("event_from_user")
+
+        data["update_context"] = UpdateContext(
+            session=data["session"],
+            chat_id=chat.id if chat else None,
+            telegram_user_id=user.id if user else None,
+        )
+
+        return await handler(event, data)
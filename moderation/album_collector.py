@@ -0,0 +1,111 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from aiogram.types import Message
+
+from constants.moderation_constants import (
+    ALBUM_COLLECT_MAX_WAIT,
+    ALBUM_COLLECT_WINDOW,
+)
+from moderation.group_context import GroupContext
+from moderation.normalization import normalize
+from moderation.media_scanner import has_scannable_media, media_violates
+from outgoing.bulk_delete import delete_messages_bulk
+
+
+@dataclass(slots=True)
+class _Album:
+    context: GroupContext
+    messages: list[Message] = field(default_factory=list)
+    first_seen: float = field(default_factory=time.monotonic)
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+class AlbumCollector:
+    """
+    Собирает сообщения одного media_group_id и проверяет альбом целиком.
+
+    Подпись проверяется один раз, картинки — параллельно, и если хоть
+    что-то нарушает правила, весь альбом удаляется одним deleteMessages.
+    """
+
+    def __init__(self, window: float, max_wait: float):
+        self.window = window
+        self.max_wait = max_wait
+        self._albums: dict[tuple[int, str], _Album] = {}
+        # ссылки на таски, чтобы их не собрал GC
+        self._tasks: set[asyncio.Task] = set()
+
+        self.scanned = 0
+        self.deleted = 0
+
+    def add(self, message: Message, context: GroupContext) -> None:
+        key = (message.chat.id, message.media_group_id)
+
+        album = self._albums.get(key)
+        if album is None:
+            album = self._albums[key] = _Album(context=context)
+            task = asyncio.create_task(self._flush_later(key, album))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        album.messages.append(message)
+        album.last_seen = time.monotonic()
+
+    async def _flush_later(self, key: tuple[int, str], album: _Album) -> None:
+        while True:
+            now = time.monotonic()
+            delay = min(
+                album.last_seen + self.window,
+                album.first_seen + self.max_wait,
+            ) - now
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+
+        self._albums.pop(key, None)
+
+        try:
+            await self._scan(album)
+        except Exception as e:
+            print("Album processing failed:", e)
+
+    async def _scan(self, album: _Album) -> None:
+        context = album.context
+        messages = album.messages
+        self.scanned += 1
+
+        # у альбома обычно одна подпись, но дубли проверяем один раз
+        captions = {m.caption for m in messages if m.caption}
+        violated = any(
+            context.matcher.search(normalize(caption))
+            for caption in captions
+        )
+
+        if not violated and context.photo_check_enabled:
+            results = await asyncio.gather(
+                *(
+                    media_violates(m, context)
+                    for m in messages
+                    if has_scannable_media(m)
+                ),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    print("Image processing failed:", result)
+            violated = any(result is True for result in results)
+
+        if not violated:
+            return
+
+        self.deleted += 1
+        await delete_messages_bulk(
+            messages[0].bot,
+            messages[0].chat.id,
+            (m.message_id for m in messages),
+        )
+
+
+album_collector = AlbumCollector(ALBUM_COLLECT_WINDOW, ALBUM_COLLECT_MAX_WAIT)
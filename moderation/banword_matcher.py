@@ -0,0 +1,91 @@
+from typing import Iterable, Sequence
+
+from moderation.normalization import normalize
+
+
+class BanwordMatcher:
+    """
+    Автомат Ахо-Корасик по бан-словам группы.
+
+    Бан-слова и текст приводятся к виду " токен токен ", поэтому
+    совпадение всегда идёт по целым словам, а фразы из нескольких слов
+    находятся за один проход по тексту.
+    """
+
+    __slots__ = ("words", "_goto", "_fail", "_out")
+
+    def __init__(self, words: Iterable[str]):
+        self.words: tuple[str, ...] = tuple(
+            dict.fromkeys(
+                " ".join(tokens)
+                for tokens in map(normalize, words)
+                if tokens
+            )
+        )
+
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # индекс найденного слова для состояния (с учётом fail-ссылок) или -1
+        self._out: list[int] = [-1]
+
+        for index, word in enumerate(self.words):
+            self._add(f" {word} ", index)
+
+        self._build_links()
+
+    def __bool__(self) -> bool:
+        return bool(self.words)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _add(self, pattern: str, index: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(-1)
+            state = next_state
+
+        if self._out[state] == -1:
+            self._out[state] = index
+
+    def _build_links(self) -> None:
+        goto, fail, out = self._goto, self._fail, self._out
+
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                link = goto[link].get(char, 0)
+
+                fail[next_state] = link
+                if out[next_state] == -1:
+                    out[next_state] = out[link]
+
+    def search(self, tokens: Sequence[str]) -> str | None:
+        """Возвращает первое найденное бан-слово или None"""
+        if not tokens or not self.words:
+            return None
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+
+        for char in f" {' '.join(tokens)} ":
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if out[state] != -1:
+                return self.words[out[state]]
+
+        return None
+
@@ -0,0 +1,91 @@
+"""
+Отрисовка картинок для капчи: искажённые цифры на шумном фоне.
+
+Только NumPy/PIL, без aiogram — вызывается из фонового потока.
+"""
+import io
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+
+WIDTH = 320
+HEIGHT = 120
+DIGITS = 4
+
+_FONT_SIZE = 64
+
+
+def _font() -> ImageFont.ImageFont:
+    return ImageFont.load_default(size=_FONT_SIZE)
+
+
+def _wave(pixels: np.ndarray, rng: random.Random) -> np.ndarray:
+    """Синусоидальный сдвиг строк и столбцов"""
+    height, width = pixels.shape[:2]
+    amplitude = rng.uniform(3, 6)
+    period = rng.uniform(40, 80)
+    phase = rng.uniform(0, 2 * np.pi)
+
+    rows = np.arange(height)[:, None]
+    cols = np.arange(width)[None, :]
+
+    src_cols = cols + amplitude * np.sin(2 * np.pi * rows / period + phase)
+    src_rows = rows + amplitude * np.sin(2 * np.pi * cols / period + phase)
+
+    src_cols = np.clip(src_cols, 0, width - 1).astype(np.intp)
+    src_rows = np.clip(src_rows, 0, height - 1).astype(np.intp)
+    return pixels[src_rows, src_cols]
+
+
+def render_captcha(code: str, seed: int | None = None) -> bytes:
+    """PNG с кодом: каждая цифра повёрнута и сдвинута, сверху шум"""
+    rng = random.Random(seed)
+    font = _font()
+
+    image = Image.new("RGB", (WIDTH, HEIGHT), (245, 245, 245))
+    step = WIDTH // (len(code) + 1)
+
+    for i, digit in enumerate(code):
+        left, top, right, bottom = font.getbbox(digit)
+        glyph = Image.new("L", (right - left + 16, bottom - top + 16), 0)
+        ImageDraw.Draw(glyph).text(
+            (8 - left, 8 - top), digit, font=font, fill=255,
+        )
+        glyph = glyph.rotate(rng.uniform(-25, 25), expand=True)
+
+        color = tuple(rng.randint(0, 110) for _ in range(3))
+        x = step * (i + 1) - glyph.width // 2 + rng.randint(-8, 8)
+        y = (HEIGHT - glyph.height) // 2 + rng.randint(-10, 10)
+        image.paste(color, (x, y), glyph)
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(4):
+        draw.line(
+            [
+                (rng.randint(0, WIDTH), rng.randint(0, HEIGHT))
+                for _ in range(3)
+            ],
+            fill=tuple(rng.randint(60, 180) for _ in range(3)),
+            width=rng.randint(1, 2),
+        )
+
+    pixels = _wave(np.asarray(image), rng)
+
+    noise = np.random.default_rng(rng.getrandbits(32)).integers(
+        -40, 40, pixels.shape, dtype=np.int16,
+    )
+    pixels = np.clip(pixels.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    image = Image.fromarray(pixels).filter(ImageFilter.SMOOTH)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def random_code(rng: random.Random | None = None) -> str:
+    rng = rng or random
+    # без ведущего нуля: код хранится и передаётся как int
+    return str(rng.randint(10 ** (DIGITS - 1), 10 ** DIGITS - 1))
@@ -0,0 +1,166 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from constants.captcha_constants import CaptchaMode
+from constants.group_constants import GroupType, OcrProfile
+from constants.moderation_constants import (
+    GROUP_CONTEXT_CACHE_SIZE,
+    GROUP_CONTEXT_CACHE_TTL,
+)
+from database.groups import Group, GroupSettings
+from database.managers import GroupBanwordsManager
+from moderation.banword_matcher import BanwordMatcher
+
+
+_EMPTY_MATCHER = BanwordMatcher(())
+
+
+@dataclass(frozen=True, slots=True)
+class GroupContext:
+    """Неизменяемый снимок группы для модерации сообщений"""
+
+    group_id: int
+    chat_id: int
+    subscription_type: GroupType
+    paid_until: datetime | None
+    captcha_enabled: bool
+    captcha_mode: CaptchaMode
+    photo_check_enabled: bool
+    ocr_profile: OcrProfile
+    banwords: tuple[str, ...]
+    matcher: BanwordMatcher = field(compare=False, repr=False)
+
+    @property
+    def is_paid(self) -> bool:
+        return self.subscription_type == GroupType.PAID
+
+
+class GroupContextCache:
+    """
+    LRU-кэш снимков групп по chat_id с TTL.
+
+    Отсутствие группы в БД тоже кэшируется (None), поэтому сообщения
+    из незарегистрированных чатов не ходят в базу.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._items: OrderedDict[
+            int, tuple[float, GroupContext | None]
+        ] = OrderedDict()
+        self._chat_by_group: dict[int, int] = {}
+        # растёт при каждой инвалидации, чтобы не сохранить
+        # снимок, который грузился параллельно с изменением
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self,
+        session: AsyncSession,
+        chat_id: int,
+    ) -> GroupContext | None:
+        entry = self._items.get(chat_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._items.move_to_end(chat_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        generation = self._generation
+        context = await self._load(session, chat_id)
+
+        if generation == self._generation:
+            self._put(chat_id, context)
+
+        return context
+
+    async def _load(
+        self,
+        session: AsyncSession,
+        chat_id: int,
+    ) -> GroupContext | None:
+        # группа и настройки — одним запросом
+        row = (
+            await session.execute(
+                select(Group, GroupSettings)
+                .outerjoin(GroupSettings, GroupSettings.group_id == Group.id)
+                .where(Group.chat_id == chat_id)
+            )
+        ).first()
+        if row is None:
+            return None
+
+        group, settings = row
+
+        # бан-слова проверяются только в платных группах
+        banwords: tuple[str, ...] = ()
+        matcher = _EMPTY_MATCHER
+        if group.subscription_type == GroupType.PAID:
+            banwords = tuple(
+                await GroupBanwordsManager(session).words(group.id)
+            )
+            # автомат живёт в снимке и вытесняется вместе с ним
+            matcher = BanwordMatcher(banwords)
+
+        return GroupContext(
+            group_id=group.id,
+            chat_id=group.chat_id,
+            subscription_type=group.subscription_type,
+            paid_until=group.paid_until,
+            captcha_enabled=bool(settings and settings.captcha_enabled),
+            captcha_mode=(
+                settings.captcha_mode if settings else CaptchaMode.BUTTON
+            ),
+            photo_check_enabled=bool(
+                settings and settings.photo_check_enabled
+            ),
+            ocr_profile=(
+                settings.ocr_profile if settings else OcrProfile.FAST
+            ),
+            banwords=banwords,
+            matcher=matcher,
+        )
+
+    def _put(self, chat_id: int, context: GroupContext | None) -> None:
+        self._items[chat_id] = (time.monotonic() + self.ttl, context)
+        self._items.move_to_end(chat_id)
+
+        if context is not None:
+            self._chat_by_group[context.group_id] = chat_id
+
+        while len(self._items) > self.maxsize:
+            _, (_, evicted) = self._items.popitem(last=False)
+            if evicted is not None:
+                self._chat_by_group.pop(evicted.group_id, None)
+
+    def invalidate_chat(self, chat_id: int) -> None:
+        self._generation += 1
+        _, context = self._items.pop(chat_id, (None, None))
+        if context is not None:
+            self._chat_by_group.pop(context.group_id, None)
+
+    def invalidate_group(self, group_id: int) -> None:
+        self._generation += 1
+        chat_id = self._chat_by_group.pop(group_id, None)
+        if chat_id is not None:
+            self._items.pop(chat_id, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._items.clear()
+        self._chat_by_group.clear()
+
+
+group_contexts = GroupContextCache(
+    maxsize=GROUP_CONTEXT_CACHE_SIZE,
+    ttl=GROUP_CONTEXT_CACHE_TTL,
+)
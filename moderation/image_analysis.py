@@ -0,0 +1,87 @@
+"""
+Функции, которые выполняются внутри процессов ImageAnalysisEngine.
+
+Модуль не должен импортировать bot/aiogram: он загружается в каждом
+дочернем процессе пула.
+"""
+import cv2
+
+from constants.group_constants import OcrProfile
+from moderation.image_frame import ImageFrame
+from moderation.ocr_preprocess import OCR_PROFILES, ocr_frame
+
+
+# QR detector (один на процесс)
+_qr_detector: cv2.QRCodeDetector | None = None
+
+
+def init_worker() -> None:
+    global _qr_detector
+
+    # пул сам распределяет работу по ядрам — потоки OpenCV только мешают
+    cv2.setNumThreads(1)
+    _qr_detector = cv2.QRCodeDetector()
+
+
+def _get_qr_detector() -> cv2.QRCodeDetector:
+    global _qr_detector
+
+    if _qr_detector is None:
+        _qr_detector = cv2.QRCodeDetector()
+    return _qr_detector
+
+
+def _as_frame(image: bytes | ImageFrame) -> ImageFrame:
+    if isinstance(image, ImageFrame):
+        return image
+    return ImageFrame.decode(memoryview(image))
+
+
+def detect_qr(image: bytes | ImageFrame) -> bool:
+    """Проверяет, есть ли QR-код на изображении"""
+    frame = _as_frame(image)
+
+    data, bbox, _ = _get_qr_detector().detectAndDecode(frame.gray)
+    return bool(bbox is not None and data)
+
+
+def extract_text_tesseract(
+    image: bytes | ImageFrame,
+    timeout: float = 0,
+    profile: OcrProfile = OcrProfile.RAW,
+) -> str:
+    """OCR через Tesseract"""
+    frame = _as_frame(image)
+
+    # timeout убивает процесс tesseract, если он завис на картинке
+    return ocr_frame(frame, OCR_PROFILES[profile], timeout)
+
+
+def analyze_image(
+    image_bytes: bytes,
+    check_qr: bool,
+    check_text: bool,
+    timeout: float = 0,
+    profile: OcrProfile = OcrProfile.RAW,
+    max_side: int = 0,
+    max_pixels: int = 0,
+) -> tuple[bool, str]:
+    """
+    QR и OCR по одной декодированной картинке.
+
+    Возвращает (есть QR, распознанный текст). Если QR найден,
+    OCR не выполняется.
+    """
+    frame = ImageFrame.decode(
+        memoryview(image_bytes),
+        max_side=max_side,
+        max_pixels=max_pixels,
+    )
+
+    if check_qr and detect_qr(frame):
+        return True, ""
+
+    if not check_text:
+        return False, ""
+
+    return False, extract_text_tesseract(frame, timeout, profile)
@@ -0,0 +1,177 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from constants.moderation_constants import (
+    IMAGE_ENGINE_JOB_TIMEOUT,
+    IMAGE_ENGINE_QUEUE_SIZE,
+    IMAGE_ENGINE_WORKERS,
+)
+from moderation.image_analysis import init_worker
+
+
+class ImageEngineBusy(Exception):
+    """Очередь задач переполнена, картинка не будет проверена"""
+
+
+class ImageAnalysisEngine:
+    """
+    Пул процессов для QR/OCR.
+
+    В пул одновременно отдаётся не больше `workers` задач, остальные
+    ждут в asyncio (их можно отменить, пока они не начались).
+    Если ждущих больше `queue_size`, новые задачи сразу отклоняются.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(self.workers)
+
+        self.waiting = 0
+        self.running = 0
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait_time = 0.0
+        self.total_run_time = 0.0
+        self.max_run_time = 0.0
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is None:
+            return
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self.waiting
+
+    def stats(self) -> dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait": self.total_wait_time / finished if finished else 0.0,
+            "avg_run": self.total_run_time / finished if finished else 0.0,
+            "max_run": self.max_run_time,
+        }
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Выполняет func(*args) в пуле.
+
+        timeout считается от постановки в очередь. По таймауту или при
+        отмене задача снимается с очереди; уже запущенная задача
+        дорабатывает в процессе, но её результат отбрасывается.
+        """
+        if self._executor is None:
+            self.start()
+
+        timeout = timeout or self.timeout
+        enqueued_at = time.monotonic()
+
+        if not self._slots.locked():
+            await self._slots.acquire()
+        else:
+            if self.waiting >= self.queue_size:
+                self.rejected += 1
+                raise ImageEngineBusy(
+                    f"очередь переполнена ({self.waiting} задач)"
+                )
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise
+            finally:
+                self.waiting -= 1
+
+        started_at = time.monotonic()
+        self.running += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # слот освобождается, только когда процесс действительно свободен
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._release)
+        )
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                max(0.0, timeout - (started_at - enqueued_at)),
+            )
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self._record(enqueued_at, started_at, failed=True)
+            raise
+        except BaseException:
+            self._record(enqueued_at, started_at, failed=True)
+            raise
+
+        self._record(enqueued_at, started_at, failed=False)
+        return result
+
+    def _release(self) -> None:
+        self.running -= 1
+        self._slots.release()
+
+    def _record(
+        self,
+        enqueued_at: float,
+        started_at: float,
+        *,
+        failed: bool,
+    ) -> None:
+        run_time = time.monotonic() - started_at
+
+        self.total_wait_time += started_at - enqueued_at
+        self.total_run_time += run_time
+        self.max_run_time = max(self.max_run_time, run_time)
+
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+
+image_engine = ImageAnalysisEngine(
+    workers=IMAGE_ENGINE_WORKERS,
+    queue_size=IMAGE_ENGINE_QUEUE_SIZE,
+    timeout=IMAGE_ENGINE_JOB_TIMEOUT,
+)
@@ -0,0 +1,110 @@
+import numpy as np
+import cv2
+from PIL import ImageFile
+
+
+# заголовка хватает, чтобы узнать размер картинки
+_HEADER_BYTES = 64 * 1024
+
+# во сколько раз libjpeg уменьшает картинку прямо при декодировании
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def read_image_size(data: bytes | memoryview) -> tuple[int, int] | None:
+    """(ширина, высота) по заголовку, без декодирования пикселей"""
+    parser = ImageFile.Parser()
+    try:
+        parser.feed(bytes(data[:_HEADER_BYTES]))
+    except Exception:
+        return None
+
+    if parser.image is None:
+        return None
+    return parser.image.size
+
+
+class ImageFrame:
+    """
+    Картинка, декодированная один раз.
+
+    Все этапы (QR, OCR) работают с одним и тем же массивом `pixels`;
+    серое изображение считается один раз и кэшируется.
+    """
+
+    __slots__ = ("pixels", "_gray")
+
+    def __init__(self, pixels: np.ndarray):
+        self.pixels = pixels
+        self._gray: np.ndarray | None = pixels if pixels.ndim == 2 else None
+
+    @classmethod
+    def decode(
+        cls,
+        data: bytes | memoryview,
+        flags: int = cv2.IMREAD_COLOR,
+        max_side: int = 0,
+        max_pixels: int = 0,
+    ) -> "ImageFrame":
+        """
+        max_side — большая сторона результата: JPEG уменьшается прямо
+        при декодировании (IMREAD_REDUCED_*), остальное — после.
+        max_pixels — отказ декодировать слишком большие картинки.
+        """
+        if max_side or max_pixels:
+            size = read_image_size(data)
+            if size is not None:
+                width, height = size
+
+                if max_pixels and width * height > max_pixels:
+                    raise ValueError(
+                        f"изображение слишком большое: {width}x{height}"
+                    )
+
+                reduce = 1
+                while (
+                    max_side
+                    and reduce < 8
+                    and max(width, height) / reduce > max_side
+                ):
+                    reduce *= 2
+
+                if reduce > 1 and flags == cv2.IMREAD_COLOR:
+                    flags = _REDUCED_FLAGS[reduce]
+
+        # frombuffer не копирует байты, копия появляется только в imdecode
+        buffer = np.frombuffer(data, np.uint8)
+        pixels = cv2.imdecode(buffer, flags)
+
+        if pixels is None:
+            raise ValueError("не удалось декодировать изображение")
+
+        if max_side and max(pixels.shape[0], pixels.shape[1]) > max_side:
+            scale = max_side / max(pixels.shape[0], pixels.shape[1])
+            pixels = cv2.resize(
+                pixels,
+                None,
+                fx=scale,
+                fy=scale,
+                interpolation=cv2.INTER_AREA,
+            )
+
+        return cls(pixels)
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.pixels, cv2.COLOR_BGR2GRAY)
+        return self._gray
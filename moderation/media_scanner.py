@@ -0,0 +1,282 @@
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.types import (
+    Animation,
+    Document,
+    Message,
+    Sticker,
+    Video,
+    VideoNote,
+)
+
+from constants.moderation_constants import (
+    DOCUMENT_DOWNLOAD_CHUNK,
+    DOCUMENT_MAX_DOWNLOAD_BYTES,
+    DOCUMENT_MAX_PIXELS,
+    DOCUMENT_MAX_SIDE,
+    MEDIA_FRAME_MAX_SIDE,
+    MEDIA_MAX_DOWNLOAD_BYTES,
+    MEDIA_MAX_FRAMES,
+    MEDIA_TIME_BUDGETS,
+)
+from moderation.group_context import GroupContext
+from moderation.image_analysis import analyze_image
+from moderation.image_engine import image_engine
+from moderation.normalization import normalize
+from moderation.photo_scanner import photo_violates, scan_photo
+from moderation.verdict_cache import PhotoVerdict, photo_verdicts
+from moderation.video_frames import sample_frames
+
+
+Media = Animation | Video | VideoNote | Sticker | Document
+
+# порядок важен: у GIF-анимации Telegram заполняет и document,
+# поэтому document проверяется последним
+MEDIA_KINDS = ("animation", "video", "video_note", "sticker")
+
+
+def is_image_document(document: Document | None) -> bool:
+    return bool(
+        document
+        and document.mime_type
+        and document.mime_type.startswith("image/")
+    )
+
+
+def get_media(message: Message) -> tuple[str, Media] | None:
+    for kind in MEDIA_KINDS:
+        media = getattr(message, kind)
+        if media:
+            return kind, media
+
+    if is_image_document(message.document):
+        return "document", message.document
+    return None
+
+
+def has_scannable_media(message: Message) -> bool:
+    return bool(message.photo) or get_media(message) is not None
+
+
+def _violates(verdict: PhotoVerdict, context: GroupContext) -> bool:
+    return verdict.has_qr or bool(context.matcher.search(verdict.tokens))
+
+
+def _suffix(kind: str, media: Media) -> str:
+    if kind == "sticker":
+        return ".webm" if media.is_video else ".webp"
+
+    mime_type = getattr(media, "mime_type", None) or ""
+    return {
+        "image/gif": ".gif",
+        "image/webp": ".webp",
+        "video/webm": ".webm",
+    }.get(mime_type, ".mp4")
+
+
+async def _download(bot: Bot, file_id: str) -> bytes:
+    file = await bot.get_file(file_id)
+    file_stream = await bot.download_file(file.file_path)
+    return file_stream.getvalue()
+
+
+async def _download_capped(
+    bot: Bot,
+    file_id: str,
+    max_bytes: int,
+) -> bytearray | None:
+    """
+    Потоковое скачивание с лимитом: если файл больше max_bytes,
+    загрузка обрывается и возвращается None. В памяти не больше
+    max_bytes + один чанк.
+    """
+    file = await bot.get_file(file_id)
+    if (file.file_size or 0) > max_bytes:
+        return None
+
+    if bot.session.api.is_local:
+        # локальный Bot API отдаёт путь к файлу на диске
+        return bytearray(await _download(bot, file_id))
+
+    url = bot.session.api.file_url(bot.token, file.file_path)
+    data = bytearray()
+
+    async for chunk in bot.session.stream_content(
+        url=url,
+        chunk_size=DOCUMENT_DOWNLOAD_CHUNK,
+    ):
+        data += chunk
+        if len(data) > max_bytes:
+            return None
+
+    return data
+
+
+def _remaining(deadline: float) -> float:
+    """Сколько секунд осталось от бюджета; по нулям — TimeoutError"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError
+    return remaining
+
+
+def _is_still_image(kind: str, media: Media) -> bool:
+    if kind == "sticker":
+        return not media.is_video
+    if kind == "document":
+        return media.mime_type != "image/gif"
+    return False
+
+
+async def scan_media(
+    bot: Bot,
+    kind: str,
+    media: Media,
+    context: GroupContext,
+    deadline: float,
+) -> bool:
+    """
+    Проверка GIF/видео/кружка/стикера/картинки-файла.
+
+    1. Превью от Telegram — как обычное фото.
+    2. Сам файл: статичный стикер или картинка — одно изображение,
+       остальное — до MEDIA_MAX_FRAMES кадров. Каждый кадр проходит
+       QR + OCR, на первом нарушении проверка останавливается.
+       Картинки-файлы скачиваются потоком с лимитом и уменьшаются
+       до DOCUMENT_MAX_SIDE ещё при декодировании.
+
+    deadline (time.monotonic) уходит в задачи пула как остаток бюджета:
+    раскадровка и tesseract в процессе останавливаются сами, а не
+    дорабатывают после того, как ожидание уже снято.
+    Токены превью входят в кэшируемый вердикт вместе с токенами кадров.
+    """
+    cache_key = f"{media.file_unique_id}:{context.ocr_profile.value}"
+
+    verdict = await photo_verdicts.get(cache_key)
+    if verdict is not None:
+        print("Media verdict from cache:", cache_key)
+        return _violates(verdict, context)
+
+    tokens: list[str] = []
+
+    # 🔥 1. превью
+    if media.thumbnail:
+        thumbnail_verdict = await scan_photo(
+            bot,
+            [media.thumbnail],
+            context.ocr_profile,
+        )
+        if thumbnail_verdict.has_qr:
+            print(f"{kind}: QR на превью")
+            await photo_verdicts.put(cache_key, thumbnail_verdict)
+            return True
+
+        if context.matcher.search(thumbnail_verdict.tokens):
+            # файл не смотрели, поэтому не кэшируем
+            print(f"{kind}: бан-слово на превью")
+            return True
+
+        tokens.extend(thumbnail_verdict.tokens)
+
+    # анимированные (.tgs) стикеры не декодируем — только превью
+    if kind == "sticker" and media.is_animated:
+        await photo_verdicts.put(cache_key, PhotoVerdict(False, tuple(tokens)))
+        return False
+
+    if kind == "document":
+        data = await _download_capped(
+            bot,
+            media.file_id,
+            DOCUMENT_MAX_DOWNLOAD_BYTES,
+        )
+        max_side, max_pixels = DOCUMENT_MAX_SIDE, DOCUMENT_MAX_PIXELS
+    elif (media.file_size or 0) <= MEDIA_MAX_DOWNLOAD_BYTES:
+        data = await _download(bot, media.file_id)
+        max_side, max_pixels = 0, 0
+    else:
+        data = None
+
+    if data is None:
+        print(f"{kind}: файл слишком большой, проверено только превью")
+        await photo_verdicts.put(cache_key, PhotoVerdict(False, tuple(tokens)))
+        return False
+
+    # 🔥 2. кадры
+    if _is_still_image(kind, media):
+        frames = [data]
+    else:
+        frames = await image_engine.run(
+            sample_frames,
+            data,
+            _suffix(kind, media),
+            MEDIA_MAX_FRAMES,
+            MEDIA_FRAME_MAX_SIDE,
+            # на декодирование — не больше половины остатка
+            _remaining(deadline) / 2,
+        )
+
+    for frame in frames:
+        try:
+            has_qr, text = await image_engine.run(
+                analyze_image,
+                frame,
+                True,
+                True,
+                min(image_engine.timeout, _remaining(deadline)),
+                context.ocr_profile,
+                max_side,
+                max_pixels,
+            )
+        except ValueError as e:
+            # битая картинка или слишком много пикселей
+            print(f"{kind}: {e}")
+            return False
+        except RuntimeError:
+            # tesseract остановлен по остатку бюджета — это TimeoutError,
+            # остальные ошибки tesseract пробрасываются как раньше
+            _remaining(deadline)
+            raise
+
+        if has_qr:
+            print(f"{kind}: QR detected")
+            await photo_verdicts.put(cache_key, PhotoVerdict(True, ()))
+            return True
+
+        frame_tokens = normalize(text)
+        # ранний выход: оставшиеся кадры не смотрим, поэтому и не кэшируем
+        if context.matcher.search(frame_tokens):
+            print(f"{kind}: бан-слово на кадре")
+            return True
+
+        tokens.extend(frame_tokens)
+
+    await photo_verdicts.put(cache_key, PhotoVerdict(False, tuple(tokens)))
+    return False
+
+
+async def media_violates(message: Message, context: GroupContext) -> bool:
+    """Есть ли в медиа сообщения QR или бан-слова группы"""
+    if message.photo:
+        return await photo_violates(message, context)
+
+    found = get_media(message)
+    if found is None:
+        return False
+
+    kind, media = found
+    budget = MEDIA_TIME_BUDGETS[kind]
+    deadline = time.monotonic() + budget
+    try:
+        async with asyncio.timeout(budget):
+            return await scan_media(
+                message.bot,
+                kind,
+                media,
+                context,
+                deadline,
+            )
+    except TimeoutError:
+        print(f"{kind}: бюджет времени исчерпан")
+        return False
@@ -0,0 +1,86 @@
+import re
+import unicodedata
+
+
+# невидимые символы, которыми разбивают слова
+_ZERO_WIDTH = (
+    "\u00ad"  # soft hyphen
+    "\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e"
+    "\u200b\u200c\u200d\u200e\u200f"
+    "\u202a\u202b\u202c\u202d\u202e"
+    "\u2060\u2061\u2062\u2063\u2064"
+    "\u2066\u2067\u2068\u2069"
+    "\u3164\ufeff\uffa0"
+)
+
+# латиница и греческие буквы, похожие на кириллицу, → кириллица;
+# бан-слова проходят ту же свёртку, поэтому смешанное написание
+# совпадает с любым вариантом
+_HOMOGLYPHS = {
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "k": "к",
+    "m": "м", "o": "о", "p": "р", "t": "т", "x": "х", "y": "у",
+    "α": "а", "β": "в", "ε": "е", "η": "н", "ι": "i", "κ": "к",
+    "μ": "м", "ν": "v", "ο": "о", "ρ": "р", "τ": "т", "υ": "у",
+    "χ": "х", "ё": "е", "і": "i", "ј": "j", "ѕ": "s", "ԁ": "d",
+    "ԛ": "q", "ԝ": "w", "һ": "н",
+}
+
+# цифры вместо букв (4ат → чат, 6ан → бан, з0л0то → золото)
+_LEET = {
+    "0": "о", "3": "з", "4": "ч", "6": "б",
+}
+
+_FOLD_TABLE = str.maketrans(
+    {
+        **dict.fromkeys(_ZERO_WIDTH),
+        **_HOMOGLYPHS,
+        **_LEET,
+    }
+)
+
+_TOKEN_RE = re.compile(r"[a-zа-я0-9]+")
+
+# с п а м / s.p.a.m — от трёх одиночных символов подряд
+_MIN_SPACED_RUN = 3
+
+
+def _collapse_spaced(tokens: list[str]) -> list[str]:
+    result: list[str] = []
+    run: list[str] = []
+
+    for token in tokens:
+        if len(token) == 1:
+            run.append(token)
+            continue
+
+        if run:
+            result.extend(
+                ["".join(run)] if len(run) >= _MIN_SPACED_RUN else run
+            )
+            run = []
+        result.append(token)
+
+    if run:
+        result.extend(["".join(run)] if len(run) >= _MIN_SPACED_RUN else run)
+
+    return result
+
+
+def normalize(text: str) -> list[str]:
+    """
+    Текст → список токенов для сравнения с бан-словами.
+
+    NFKC, нижний регистр, одна свёртка через str.translate (невидимые
+    символы, похожие буквы, цифры вместо букв) и склейка слов,
+    написанных через пробел по одной букве.
+    """
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+
+    tokens = _TOKEN_RE.findall(text.lower().translate(_FOLD_TABLE))
+    return _collapse_spaced(tokens)
+
+
+def normalize_banword(word: str) -> str:
+    """Бан-слово в том виде, в каком его сравнивает BanwordMatcher"""
+    return " ".join(normalize(word))
@@ -0,0 +1,310 @@
+"""
+Подготовка картинки к tesseract (выполняется в процессах пула).
+
+Время tesseract растёт с числом пикселей, поэтому картинка
+уменьшается, бинаризуется, а OCR запускается только по блокам,
+похожим на текст. Если таких блоков нет, tesseract не вызывается;
+если их много — читается одна вырезка по их общей рамке.
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import cv2
+import pytesseract
+
+from constants.group_constants import OcrProfile
+from moderation.image_frame import ImageFrame
+
+
+@dataclass(frozen=True, slots=True)
+class OcrOptions:
+    preprocess: bool
+    # большая сторона после уменьшения (аналог целевого DPI для скриншотов)
+    target_side: int = 1600
+    crop_regions: bool = True
+    # блоки меньше этой доли картинки отбрасываются
+    min_region_ratio: float = 0.0015
+    # больше блоков — одна вырезка по общей рамке (tesseract — процесс
+    # на каждую вырезку)
+    max_regions: int = 8
+    # если блоки занимают больше этой доли, OCR идёт по всей картинке
+    full_image_ratio: float = 0.5
+
+
+OCR_PROFILES: dict[OcrProfile, OcrOptions] = {
+    OcrProfile.RAW: OcrOptions(preprocess=False),
+    OcrProfile.FAST: OcrOptions(preprocess=True, target_side=1280),
+    OcrProfile.ACCURATE: OcrOptions(
+        preprocess=True,
+        target_side=2000,
+        crop_regions=False,
+    ),
+}
+
+_LANG = "rus+eng"
+# psm 6 — один блок текста, подходит для вырезанных регионов
+_BLOCK_CONFIG = "--psm 6"
+_MIN_EDGE_STRENGTH = 40
+# в блоке текста заметная часть пикселей — края букв
+_MIN_FILL = 0.12
+
+
+def resize_to_side(gray: np.ndarray, target_side: int) -> np.ndarray:
+    side = max(gray.shape[0], gray.shape[1])
+    if side <= target_side:
+        return gray
+
+    scale = target_side / side
+    return cv2.resize(
+        gray,
+        None,
+        fx=scale,
+        fy=scale,
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    return cv2.adaptiveThreshold(
+        gray,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        31,
+        15,
+    )
+
+
+def find_text_regions(
+    gray: np.ndarray,
+    options: OcrOptions,
+) -> list[tuple[int, int, int, int]]:
+    """
+    Блоки, похожие на текст: морфологический градиент + склейка букв
+    в строки и строк в блоки. Из блоков, слипшихся с шумом фона, берутся
+    плотные полосы строк, куски одной строки склеиваются.
+    Возвращает все (x, y, w, h), крупные первыми.
+    """
+    height, width = gray.shape[:2]
+
+    gradient = cv2.morphologyEx(
+        gray,
+        cv2.MORPH_GRADIENT,
+        cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)),
+    )
+    # Оцу всегда что-то найдёт, поэтому слабые перепады (шум, градиенты)
+    # отсекаем минимальным порогом
+    otsu, _ = cv2.threshold(
+        gradient,
+        0,
+        255,
+        cv2.THRESH_BINARY | cv2.THRESH_OTSU,
+    )
+    _, mask = cv2.threshold(
+        gradient,
+        max(otsu, _MIN_EDGE_STRENGTH),
+        255,
+        cv2.THRESH_BINARY,
+    )
+
+    # буквы → строки
+    line_kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT,
+        (max(9, width // 80), 1),
+    )
+    lines = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, line_kernel)
+
+    # строки → блоки
+    block_kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT,
+        (max(15, width // 60), max(7, height // 120)),
+    )
+    blocks = cv2.dilate(lines, block_kernel)
+
+    contours, _ = cv2.findContours(
+        blocks,
+        cv2.RETR_EXTERNAL,
+        cv2.CHAIN_APPROX_SIMPLE,
+    )
+
+    min_area = options.min_region_ratio * height * width
+    regions = []
+
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w * h < min_area or h < 8:
+            continue
+
+        fill = cv2.countNonZero(lines[y:y + h, x:x + w]) / (w * h)
+        if fill >= _MIN_FILL:
+            regions.append((x, y, w, h))
+            continue
+
+        # строка, слипшаяся с шумом фона, — плотная полоса внутри блока
+        for band in _dense_bands(lines, (x, y, w, h)):
+            if band[2] * band[3] >= min_area:
+                regions.append(band)
+
+    regions = _merge_lines(regions)
+    regions.sort(key=lambda r: r[2] * r[3], reverse=True)
+    return regions
+
+
+def _dense_bands(
+    lines: np.ndarray,
+    region: tuple[int, int, int, int],
+) -> list[tuple[int, int, int, int]]:
+    """Полосы строк блока, заполненные краями не меньше _MIN_FILL"""
+    x, y, w, h = region
+    crop = lines[y:y + h, x:x + w]
+    dense = np.count_nonzero(crop, axis=1) >= _MIN_FILL * w
+
+    bands = []
+    start = None
+    for row, is_dense in enumerate(np.append(dense, False)):
+        if is_dense and start is None:
+            start = row
+        elif not is_dense and start is not None:
+            if row - start >= 8:
+                columns = np.flatnonzero(crop[start:row].any(axis=0))
+                left, right = columns[0], columns[-1] + 1
+                bands.append((x + left, y + start, right - left, row - start))
+            start = None
+
+    return bands
+
+
+def _merge_lines(
+    regions: list[tuple[int, int, int, int]],
+) -> list[tuple[int, int, int, int]]:
+    """
+    Склеивает куски одной строки: на пёстром фоне строка рвётся на блоки,
+    и слово между ними может не пройти порог заполнения. Блоки, которые
+    по высоте перекрываются больше чем наполовину и стоят не дальше
+    двух высот строки, объединяются.
+    """
+    merged = list(regions)
+    changed = True
+
+    while changed:
+        changed = False
+        merged.sort()
+
+        for i, (x, y, w, h) in enumerate(merged):
+            for j in range(i + 1, len(merged)):
+                ox, oy, ow, oh = merged[j]
+                if ox - (x + w) > 2 * max(h, oh):
+                    continue
+
+                overlap = min(y + h, oy + oh) - max(y, oy)
+                if overlap < min(h, oh) / 2:
+                    continue
+
+                left, top = min(x, ox), min(y, oy)
+                merged[i] = (
+                    left,
+                    top,
+                    max(x + w, ox + ow) - left,
+                    max(y + h, oy + oh) - top,
+                )
+                del merged[j]
+                changed = True
+                break
+
+            if changed:
+                break
+
+    return merged
+
+
+def _pad(
+    region: tuple[int, int, int, int],
+    width: int,
+    height: int,
+) -> tuple[int, int, int, int]:
+    x, y, w, h = region
+    pad = max(4, h // 10)
+    left, top = max(0, x - pad), max(0, y - pad)
+    return (
+        left,
+        top,
+        min(width, x + w + pad) - left,
+        min(height, y + h + pad) - top,
+    )
+
+
+def plan_ocr(
+    gray: np.ndarray,
+    options: OcrOptions,
+) -> list[tuple[tuple[int, int, int, int], str]]:
+    """
+    Что отдать tesseract: [((x, y, w, h), config)] в координатах gray.
+    Пустой список — текста на картинке нет.
+    """
+    height, width = gray.shape[:2]
+    full_image = ((0, 0, width, height), "")
+
+    regions = find_text_regions(gray, options)
+    if not regions:
+        return []
+
+    if not options.crop_regions:
+        return [full_image]
+
+    if len(regions) > options.max_regions:
+        # абзацы, скриншоты переписок: одна вырезка, разбивку на блоки
+        # tesseract сделает сам
+        left = min(x for x, _, _, _ in regions)
+        top = min(y for _, y, _, _ in regions)
+        right = max(x + w for x, _, w, _ in regions)
+        bottom = max(y + h for _, y, _, h in regions)
+        union = _pad((left, top, right - left, bottom - top), width, height)
+
+        if union[2] * union[3] > options.full_image_ratio * width * height:
+            return [full_image]
+        return [(union, "")]
+
+    covered = sum(w * h for _, _, w, h in regions)
+    if covered > options.full_image_ratio * width * height:
+        return [full_image]
+
+    return [
+        (_pad(region, width, height), _BLOCK_CONFIG)
+        for region in regions
+    ]
+
+
+def _tesseract(image: np.ndarray, config: str, deadline: float) -> str:
+    timeout = 0.0
+    if deadline:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise RuntimeError("Tesseract process timeout")
+
+    return pytesseract.image_to_string(
+        image,
+        lang=_LANG,
+        config=config,
+        timeout=timeout,
+    )
+
+
+def ocr_frame(
+    frame: ImageFrame,
+    options: OcrOptions,
+    timeout: float = 0,
+) -> str:
+    deadline = time.monotonic() + timeout if timeout else 0.0
+
+    if not options.preprocess:
+        return _tesseract(frame.gray, "", deadline)
+
+    gray = resize_to_side(frame.gray, options.target_side)
+
+    texts = []
+    for (x, y, w, h), config in plan_ocr(gray, options):
+        crop = gray[y:y + h, x:x + w]
+        texts.append(_tesseract(binarize(crop), config, deadline))
+
+    return "\n".join(texts)
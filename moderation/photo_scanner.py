@@ -0,0 +1,118 @@
+from aiogram import Bot
+from aiogram.types import Message, PhotoSize
+
+from constants.group_constants import OcrProfile
+from constants.moderation_constants import (
+    PHOTO_OCR_MIN_SIDE,
+    PHOTO_QR_MIN_SIDE,
+    PHOTO_QR_RECHECK_ON_OCR,
+)
+from moderation.group_context import GroupContext
+from moderation.image_analysis import analyze_image
+from moderation.image_engine import image_engine
+from moderation.normalization import normalize
+from moderation.verdict_cache import PhotoVerdict, photo_verdicts
+
+
+def pick_photo_size(photos: list[PhotoSize], min_side: int) -> PhotoSize:
+    """Наименьший вариант фото с большей стороной >= min_side"""
+    by_area = sorted(photos, key=lambda p: p.width * p.height)
+
+    for photo in by_area:
+        if max(photo.width, photo.height) >= min_side:
+            return photo
+
+    return by_area[-1]
+
+
+async def download_photo(bot: Bot, photo: PhotoSize) -> bytes:
+    file = await bot.get_file(photo.file_id)
+    file_stream = await bot.download_file(file.file_path)
+    # getvalue() отдаёт внутренний буфер BytesIO без лишней копии
+    image_bytes = file_stream.getvalue()
+    print(
+        f"Image downloaded {photo.width}x{photo.height}, "
+        f"size: {len(image_bytes)}"
+    )
+    return image_bytes
+
+
+async def scan_photo(
+    bot: Bot,
+    photos: list[PhotoSize],
+    ocr_profile: OcrProfile = OcrProfile.FAST,
+) -> PhotoVerdict:
+    """
+    QR + OCR по фото с кэшем по file_unique_id.
+
+    1. QR ищется на среднем размере (PHOTO_QR_MIN_SIDE), при находке
+       дальше не идём.
+    2. Для OCR докачивается размер под PHOTO_OCR_MIN_SIDE — только если
+       он отличается от уже скачанного.
+
+    Повторы одной и той же картинки (в любых группах) не скачиваются
+    и не распознаются заново.
+    """
+    # ключ — самый большой вариант: он одинаковый у всех репостов;
+    # текст зависит от профиля OCR, поэтому профиль тоже в ключе
+    cache_key = f"{photos[-1].file_unique_id}:{ocr_profile.value}"
+
+    verdict = await photo_verdicts.get(cache_key)
+    if verdict is not None:
+        print("Photo verdict from cache:", cache_key)
+        return verdict
+
+    qr_photo = pick_photo_size(photos, PHOTO_QR_MIN_SIDE)
+    ocr_photo = pick_photo_size(photos, PHOTO_OCR_MIN_SIDE)
+
+    image_bytes = await download_photo(bot, qr_photo)
+
+    if ocr_photo.file_unique_id == qr_photo.file_unique_id:
+        # один размер — одно декодирование на оба этапа
+        has_qr, extracted_text = await image_engine.run(
+            analyze_image,
+            image_bytes,
+            True,
+            True,
+            image_engine.timeout,
+            ocr_profile,
+        )
+    else:
+        # 🔥 2.1 QR
+        has_qr, extracted_text = await image_engine.run(
+            analyze_image,
+            image_bytes,
+            True,
+            False,
+        )
+
+        # 🔥 2.2 OCR (Tesseract)
+        if not has_qr:
+            image_bytes = await download_photo(bot, ocr_photo)
+            has_qr, extracted_text = await image_engine.run(
+                analyze_image,
+                image_bytes,
+                PHOTO_QR_RECHECK_ON_OCR,
+                True,
+                image_engine.timeout,
+                ocr_profile,
+            )
+
+    if has_qr:
+        print("QR detected")
+        verdict = PhotoVerdict(has_qr=True, tokens=())
+    else:
+        print("Text extracted:", extracted_text)
+        verdict = PhotoVerdict(
+            has_qr=False,
+            tokens=tuple(normalize(extracted_text)),
+        )
+
+    await photo_verdicts.put(cache_key, verdict)
+    return verdict
+
+
+async def photo_violates(message: Message, context: GroupContext) -> bool:
+    """Есть ли на фото сообщения QR или бан-слова группы"""
+    verdict = await scan_photo(message.bot, message.photo, context.ocr_profile)
+    return verdict.has_qr or bool(context.matcher.search(verdict.tokens))
@@ -0,0 +1,341 @@
+import asyncio
+import html
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup
+from aiogram.types import User as TelegramUser
+
+from constants.captcha_constants import (
+    CAPTCHA_TIMEOUT,
+    RAID_COOLDOWN,
+    RAID_PROMPT_EDIT_INTERVAL,
+    RAID_PROMPT_MAX_MENTIONS,
+    RAID_THRESHOLD,
+    RAID_WINDOW,
+)
+from keyboards.group_keyboards import shared_captcha_keyboard
+from moderation.captcha_render import random_code, render_captcha
+from outgoing.bulk_delete import delete_messages_bulk
+from outgoing.scheduler import Priority, outbound_priority
+from queues.captcha_deadlines import CaptchaDeadlineScheduler, captcha_deadlines
+from queues.captcha_pool import CaptchaImage, captcha_images
+
+
+class RaidDetector:
+    """
+    Скользящее окно вступлений и первых сообщений по чатам.
+
+    На чат хранится не больше threshold отметок времени: рейд — это
+    threshold событий за window секунд. Раз в window удаляются окна
+    чатов, где за это время ничего не было, и закончившиеся рейды.
+    """
+
+    def __init__(self, window: float, threshold: int, cooldown: float):
+        self.window = window
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self._events: dict[int, deque[float]] = {}
+        self._raid_until: dict[int, float] = {}
+        self._next_sweep = 0.0
+
+        self.raids = 0
+
+    def _sweep(self, now: float) -> None:
+        stale = now - self.window
+        for chat_id in [
+            chat_id
+            for chat_id, events in self._events.items()
+            if events[-1] <= stale
+        ]:
+            del self._events[chat_id]
+
+        for chat_id in [
+            chat_id
+            for chat_id, until in self._raid_until.items()
+            if until <= now
+        ]:
+            del self._raid_until[chat_id]
+
+        self._next_sweep = now + self.window
+
+    def record(self, chat_id: int) -> bool:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        events = self._events.get(chat_id)
+        if events is None:
+            events = self._events[chat_id] = deque(maxlen=self.threshold)
+        events.append(now)
+
+        if len(events) == self.threshold and events[0] > now - self.window:
+            if not self.is_active(chat_id):
+                print(f"Рейд в чате {chat_id}")
+                self.raids += 1
+            self._raid_until[chat_id] = now + self.cooldown
+
+        return self.is_active(chat_id)
+
+    def is_active(self, chat_id: int) -> bool:
+        until = self._raid_until.get(chat_id)
+        if until is None:
+            return False
+
+        if until <= time.monotonic():
+            del self._raid_until[chat_id]
+            self._events.pop(chat_id, None)
+            return False
+
+        return True
+
+
+@dataclass(slots=True)
+class _SharedPrompt:
+    message_id: int | None = None
+    text: str = ""
+    # telegram id → упоминание, в порядке прихода
+    users: dict[int, str] = field(default_factory=dict)
+    to_delete: list[int] = field(default_factory=list)
+    # картинка с кодом для групп с капчей-картинкой; None — кнопка
+    image: CaptchaImage | None = None
+    # варианты ответа перемешиваются один раз на всё сообщение
+    markup: InlineKeyboardMarkup | None = None
+
+
+class SharedCaptchaPrompts:
+    """
+    Одна капча на чат во время рейда.
+
+    Вместо сообщения на каждого пользователя — общее сообщение
+    с кнопкой для всех ожидающих, которое раз в edit_interval
+    отправляется или редактируется. Там же пачкой удаляются
+    сообщения ожидающих, так что на чат за интервал уходит
+    не больше одного send/edit и одного deleteMessages на 100 id.
+    Кто прошёл капчу или истёк, определяется по captcha_deadlines.
+
+    В группах с капчей-картинкой общее сообщение — тоже картинка,
+    код у всех ожидающих один.
+    """
+
+    def __init__(
+        self,
+        deadlines: CaptchaDeadlineScheduler,
+        edit_interval: float,
+        max_mentions: int,
+    ):
+        self.deadlines = deadlines
+        self.edit_interval = edit_interval
+        self.max_mentions = max_mentions
+
+        self._prompts: dict[int, _SharedPrompt] = {}
+        self._task: asyncio.Task | None = None
+        self._bot: Bot | None = None
+
+        self.sends = 0
+        self.edits = 0
+
+    def start(self, bot: Bot) -> None:
+        if self._task is not None:
+            return
+
+        self._bot = bot
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._prompts
+
+    def add(self, chat_id: int, user: TelegramUser, image_mode: bool) -> int:
+        """
+        Ставит пользователя в общую капчу чата.
+
+        Возвращает код, который он должен выбрать (0 — капча-кнопка).
+        Вид капчи выбирается, когда в чате появляется общее сообщение.
+        """
+        prompt = self._prompts.get(chat_id)
+        if prompt is None:
+            prompt = self._prompts[chat_id] = _SharedPrompt()
+            if image_mode:
+                # пустой пул — код сейчас, картинка дорисуется к отправке
+                prompt.image = captcha_images.take() or CaptchaImage(
+                    answer=int(random_code()),
+                    png=b"",
+                )
+
+        prompt.users[user.id] = (
+            f'<a href="tg://user?id={user.id}">'
+            f"{html.escape(user.first_name)}</a>"
+        )
+        return prompt.image.answer if prompt.image else 0
+
+    def delete_later(self, chat_id: int, message_id: int) -> None:
+        prompt = self._prompts.setdefault(chat_id, _SharedPrompt())
+        prompt.to_delete.append(message_id)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.edit_interval)
+
+            # задачи ниже наследуют приоритет через contextvars
+            with outbound_priority(Priority.CAPTCHA):
+                await self._refresh_all()
+
+    async def _refresh_all(self) -> None:
+        chat_ids = list(self._prompts)
+        results = await asyncio.gather(
+            *(
+                self._refresh(chat_id, self._prompts[chat_id])
+                for chat_id in chat_ids
+            ),
+            return_exceptions=True,
+        )
+
+        # ошибка одного чата не мешает остальным, но и не теряется
+        for chat_id, result in zip(chat_ids, results):
+            if isinstance(result, Exception):
+                print(f"Shared captcha error in {chat_id}:", result)
+
+    def _render(self, prompt: _SharedPrompt) -> str:
+        mentions = list(prompt.users.values())
+        shown = ", ".join(mentions[:self.max_mentions])
+        hidden = len(mentions) - self.max_mentions
+
+        if hidden > 0:
+            shown += f" и ещё {hidden}"
+
+        action = (
+            "выберите код с картинки"
+            if prompt.image
+            else "подтвердите, что вы не бот"
+        )
+        return (
+            "🚨 Много новых участников\n"
+            f"👋 {shown}, {action}\n"
+            f"⏳ У вас {CAPTCHA_TIMEOUT} секунд"
+        )
+
+    async def _send(self, chat_id: int, prompt: _SharedPrompt, text: str) -> int:
+        image = prompt.image
+        if image is None:
+            message = await self._bot.send_message(
+                chat_id,
+                text,
+                parse_mode="HTML",
+                reply_markup=prompt.markup,
+            )
+            return message.message_id
+
+        if image.file_id is None and not image.png:
+            image.png = await asyncio.to_thread(
+                render_captcha,
+                str(image.answer),
+            )
+
+        message = await self._bot.send_photo(
+            chat_id,
+            photo=image.file_id or BufferedInputFile(image.png, "captcha.png"),
+            caption=text,
+            parse_mode="HTML",
+            reply_markup=prompt.markup,
+        )
+        if image.file_id is None:
+            image.file_id = message.photo[-1].file_id
+        return message.message_id
+
+    async def _edit(self, chat_id: int, prompt: _SharedPrompt, text: str) -> None:
+        if prompt.image is None:
+            await self._bot.edit_message_text(
+                text,
+                chat_id=chat_id,
+                message_id=prompt.message_id,
+                parse_mode="HTML",
+                reply_markup=prompt.markup,
+            )
+        else:
+            await self._bot.edit_message_caption(
+                chat_id=chat_id,
+                message_id=prompt.message_id,
+                caption=text,
+                parse_mode="HTML",
+                reply_markup=prompt.markup,
+            )
+
+    async def _refresh(self, chat_id: int, prompt: _SharedPrompt) -> None:
+        prompt.users = {
+            user_id: mention
+            for user_id, mention in prompt.users.items()
+            if (chat_id, user_id) in self.deadlines
+        }
+
+        if prompt.to_delete:
+            message_ids, prompt.to_delete = prompt.to_delete, []
+            await delete_messages_bulk(self._bot, chat_id, message_ids)
+
+        if not prompt.users:
+            del self._prompts[chat_id]
+            if prompt.message_id is not None:
+                await delete_messages_bulk(
+                    self._bot,
+                    chat_id,
+                    [prompt.message_id],
+                )
+            return
+
+        text = self._render(prompt)
+        if text == prompt.text:
+            return
+
+        if prompt.markup is None:
+            prompt.markup = shared_captcha_keyboard(
+                chat_id,
+                prompt.image.answer if prompt.image else 0,
+            )
+
+        if prompt.message_id is None:
+            prompt.message_id = await self._send(chat_id, prompt, text)
+            self.sends += 1
+        else:
+            try:
+                await self._edit(chat_id, prompt, text)
+            except TelegramBadRequest as e:
+                print(f"Не удалось обновить общую капчу в {chat_id}: {e}")
+            self.edits += 1
+
+        prompt.text = text
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "chats": len(self._prompts),
+            "pending": sum(len(p.users) for p in self._prompts.values()),
+            "sends": self.sends,
+            "edits": self.edits,
+        }
+
+
+raid_detector = RaidDetector(
+    window=RAID_WINDOW,
+    threshold=RAID_THRESHOLD,
+    cooldown=RAID_COOLDOWN,
+)
+
+shared_prompts = SharedCaptchaPrompts(
+    deadlines=captcha_deadlines,
+    edit_interval=RAID_PROMPT_EDIT_INTERVAL,
+    max_mentions=RAID_PROMPT_MAX_MENTIONS,
+)
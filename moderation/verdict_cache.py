@@ -0,0 +1,164 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from constants.moderation_constants import (
+    PHOTO_VERDICT_CACHE_PATH,
+    PHOTO_VERDICT_CACHE_SIZE,
+    PHOTO_VERDICT_DISK_MAX_ROWS,
+)
+
+
+# меняется вместе с форматом токенов (normalize), старые записи игнорируются
+_TABLE = "photo_verdicts_v2"
+# как часто (в записях) подрезать таблицу до max_rows
+_PRUNE_EVERY = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class PhotoVerdict:
+    """
+    Результат анализа картинки, не зависящий от группы.
+
+    Бан-слова у каждой группы свои, поэтому храним не «удалить/оставить»,
+    а найденный QR и нормализованные токены OCR.
+    """
+
+    has_qr: bool
+    tokens: tuple[str, ...]
+
+
+class PhotoVerdictCache:
+    """LRU в памяти + необязательный sqlite-файл, переживающий рестарт"""
+
+    def __init__(self, maxsize: int, path: str = "", max_rows: int = 0):
+        self.maxsize = maxsize
+        self.path = path
+        self.max_rows = max_rows
+
+        self._items: OrderedDict[str, PhotoVerdict] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def open(self) -> None:
+        if not self.path or self._db is not None:
+            return
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {_TABLE} ("
+            " file_unique_id TEXT PRIMARY KEY,"
+            " has_qr INTEGER NOT NULL,"
+            " tokens TEXT NOT NULL,"
+            " created_at REAL NOT NULL"
+            ")"
+        )
+        self._db.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{_TABLE}_created_at "
+            f"ON {_TABLE} (created_at)"
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        if self._db is None:
+            return
+
+        with self._db_lock:
+            self._db.close()
+            self._db = None
+
+    async def get(self, file_unique_id: str) -> PhotoVerdict | None:
+        verdict = self._items.get(file_unique_id)
+        if verdict is not None:
+            self._items.move_to_end(file_unique_id)
+            self.hits += 1
+            return verdict
+
+        if self._db is not None:
+            verdict = await asyncio.to_thread(self._disk_get, file_unique_id)
+            if verdict is not None:
+                self._remember(file_unique_id, verdict)
+                self.disk_hits += 1
+                return verdict
+
+        self.misses += 1
+        return None
+
+    async def put(self, file_unique_id: str, verdict: PhotoVerdict) -> None:
+        self._remember(file_unique_id, verdict)
+
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, file_unique_id, verdict)
+
+    def _remember(self, file_unique_id: str, verdict: PhotoVerdict) -> None:
+        self._items[file_unique_id] = verdict
+        self._items.move_to_end(file_unique_id)
+
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def _disk_get(self, file_unique_id: str) -> PhotoVerdict | None:
+        with self._db_lock:
+            if self._db is None:
+                return None
+
+            row = self._db.execute(
+                f"SELECT has_qr, tokens FROM {_TABLE} "
+                "WHERE file_unique_id = ?",
+                (file_unique_id,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        has_qr, tokens = row
+        return PhotoVerdict(
+            has_qr=bool(has_qr),
+            tokens=tuple(tokens.split()),
+        )
+
+    def _disk_put(self, file_unique_id: str, verdict: PhotoVerdict) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {_TABLE} "
+                "(file_unique_id, has_qr, tokens, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    file_unique_id,
+                    int(verdict.has_qr),
+                    " ".join(verdict.tokens),
+                    time.time(),
+                ),
+            )
+
+            self._writes += 1
+            if self.max_rows and self._writes % _PRUNE_EVERY == 0:
+                self._db.execute(
+                    f"DELETE FROM {_TABLE} WHERE created_at < ("
+                    f" SELECT created_at FROM {_TABLE}"
+                    " ORDER BY created_at DESC LIMIT 1 OFFSET ?"
+                    ")",
+                    (self.max_rows,),
+                )
+
+            self._db.commit()
+
+
+photo_verdicts = PhotoVerdictCache(
+    maxsize=PHOTO_VERDICT_CACHE_SIZE,
+    path=PHOTO_VERDICT_CACHE_PATH,
+    max_rows=PHOTO_VERDICT_DISK_MAX_ROWS,
+)
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from constants.captcha_constants import VERIFIED_MEMBERS_MAX_CHATS
+from database.managers import CaptchaLogsManager
+
+
+class VerifiedMembers:
+    """
+    Кому в группе капча не нужна: множество telegram id по chat_id.
+
+    Множество группы грузится одним запросом при первом сообщении
+    (прошедшие капчу + админы), дальше поддерживается captcha_confirm
+    и сменой ролей — повторные сообщения проверяются без базы.
+    Кого в множестве нет, фильтр проверяет по БД как раньше и при
+    успехе добавляет сюда. Группы вытесняются по LRU.
+    """
+
+    def __init__(self, max_chats: int):
+        self.max_chats = max_chats
+
+        self._chats: OrderedDict[int, set[int]] = OrderedDict()
+        # растёт при каждой инвалидации, чтобы не сохранить
+        # множество, которое грузилось параллельно с изменением
+        self._generation = 0
+
+        self.hits = 0
+        self.loads = 0
+
+    async def is_verified(
+        self,
+        session: AsyncSession,
+        chat_id: int,
+        group_id: int,
+        telegram_user_id: int,
+    ) -> bool:
+        members = self._chats.get(chat_id)
+
+        if members is None:
+            generation = self._generation
+            members = await CaptchaLogsManager(
+                session
+            ).verified_telegram_ids(group_id)
+            self.loads += 1
+
+            if generation == self._generation:
+                self._put(chat_id, members)
+        else:
+            self._chats.move_to_end(chat_id)
+            self.hits += 1
+
+        return telegram_user_id in members
+
+    def _put(self, chat_id: int, members: set[int]) -> None:
+        self._chats[chat_id] = members
+        self._chats.move_to_end(chat_id)
+
+        while len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+
+    def add(self, chat_id: int, telegram_user_id: int) -> None:
+        # незагруженная группа получит пользователя из БД при загрузке
+        members = self._chats.get(chat_id)
+        if members is not None:
+            members.add(telegram_user_id)
+
+    def discard(self, chat_id: int, telegram_user_id: int) -> None:
+        """Пользователь снова проходит полную проверку по БД"""
+        self._generation += 1
+        members = self._chats.get(chat_id)
+        if members is not None:
+            members.discard(telegram_user_id)
+
+    def invalidate_chat(self, chat_id: int) -> None:
+        self._generation += 1
+        self._chats.pop(chat_id, None)
+
+
+verified_members = VerifiedMembers(VERIFIED_MEMBERS_MAX_CHATS)
@@ -0,0 +1,84 @@
+"""
+Выборка кадров из видео/GIF (выполняется в процессах пула).
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import cv2
+
+
+def _encode(frame: np.ndarray, max_side: int) -> bytes:
+    side = max(frame.shape[0], frame.shape[1])
+    if side > max_side:
+        scale = max_side / side
+        frame = cv2.resize(
+            frame,
+            None,
+            fx=scale,
+            fy=scale,
+            interpolation=cv2.INTER_AREA,
+        )
+
+    _, encoded = cv2.imencode(".png", frame)
+    return encoded.tobytes()
+
+
+def sample_frames(
+    video_bytes: bytes,
+    suffix: str,
+    max_frames: int,
+    max_side: int,
+    time_budget: float,
+) -> list[bytes]:
+    """
+    Равномерно выбирает до max_frames кадров и отдаёт их в PNG.
+
+    VideoCapture умеет читать только из файла, поэтому байты пишутся
+    во временный файл. Если время вышло, возвращается то, что успели.
+    """
+    deadline = time.monotonic() + time_budget
+    frames: list[bytes] = []
+
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(video_bytes)
+
+        capture = cv2.VideoCapture(path)
+        try:
+            total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+            if total > 0:
+                # середины равных отрезков: первый кадр часто пустой
+                step = total / max_frames
+                positions = sorted({
+                    min(total - 1, int(step * (i + 0.5)))
+                    for i in range(max_frames)
+                })
+            else:
+                positions = []
+
+            for position in positions:
+                if time.monotonic() > deadline:
+                    break
+
+                capture.set(cv2.CAP_PROP_POS_FRAMES, position)
+                ok, frame = capture.read()
+                if ok:
+                    frames.append(_encode(frame, max_side))
+
+            # кол-во кадров неизвестно (часть GIF) — читаем подряд
+            if not positions:
+                while len(frames) < max_frames and time.monotonic() < deadline:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    frames.append(_encode(frame, max_side))
+        finally:
+            capture.release()
+    finally:
+        os.unlink(path)
+
+    return frames
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from constants.api_constants import (
+    BULK_DELETE_CONCURRENCY,
+    DELETE_MESSAGES_CHUNK,
+)
+
+
+_delete_slots = asyncio.Semaphore(BULK_DELETE_CONCURRENCY)
+
+
+async def _delete_chunk(bot: Bot, chat_id: int, message_ids: list[int]) -> bool:
+    # RetryAfter повторяет OutboundScheduler, сюда он доходит,
+    # только когда попытки кончились
+    async with _delete_slots:
+        try:
+            return await bot.delete_messages(chat_id, message_ids)
+        except (TelegramBadRequest, TelegramRetryAfter) as e:
+            print(f"Не удалось удалить сообщения в {chat_id}: {e}")
+            return False
+
+
+async def delete_messages_bulk(
+    bot: Bot,
+    chat_id: int,
+    message_ids: Iterable[int],
+) -> bool:
+    """
+    Удаляет сообщения пачками по 100 через deleteMessages.
+
+    Пачки идут параллельно, но не больше BULK_DELETE_CONCURRENCY
+    одновременно.
+    """
+    ids = sorted(set(message_ids))
+    if not ids:
+        return True
+
+    results = await asyncio.gather(
+        *(
+            _delete_chunk(bot, chat_id, ids[i:i + DELETE_MESSAGES_CHUNK])
+            for i in range(0, len(ids), DELETE_MESSAGES_CHUNK)
+        )
+    )
+    return all(results)
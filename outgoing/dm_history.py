@@ -0,0 +1,65 @@
+from collections import OrderedDict, deque
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.enums import ChatType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import Message
+
+from constants.api_constants import DM_HISTORY_MAX_CHATS, DM_HISTORY_PER_CHAT
+
+
+class DmHistory:
+    """id сообщений в личных чатах, которые реально существуют"""
+
+    def __init__(self, per_chat: int, max_chats: int):
+        self.per_chat = per_chat
+        self.max_chats = max_chats
+        self._chats: OrderedDict[int, deque[int]] = OrderedDict()
+
+    def add(self, chat_id: int, message_id: int) -> None:
+        ids = self._chats.get(chat_id)
+        if ids is None:
+            ids = self._chats[chat_id] = deque(maxlen=self.per_chat)
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+
+        ids.append(message_id)
+
+    def pop(self, chat_id: int) -> list[int]:
+        return list(self._chats.pop(chat_id, ()))
+
+
+dm_history = DmHistory(DM_HISTORY_PER_CHAT, DM_HISTORY_MAX_CHATS)
+
+
+def _track(result: Any) -> None:
+    messages = result if isinstance(result, list) else [result]
+
+    for message in messages:
+        if isinstance(message, Message) and message.chat.type == ChatType.PRIVATE:
+            dm_history.add(message.chat.id, message.message_id)
+
+
+class DmHistoryRequestMiddleware(BaseRequestMiddleware):
+    """Запоминает сообщения, которые бот отправил в личку"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        response = await make_request(bot, method)
+
+        # edit* тоже возвращают Message, но это не новые сообщения
+        if method.__api_method__.startswith(("send", "forward")):
+            _track(response.result)
+
+        return response
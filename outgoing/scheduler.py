@@ -0,0 +1,322 @@
+import asyncio
+import contextlib
+import enum
+import heapq
+import itertools
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+from constants.api_constants import (
+    OUTBOUND_GLOBAL_BURST,
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_GROUP_BURST,
+    OUTBOUND_GROUP_RATE,
+    OUTBOUND_MAX_CHATS,
+    OUTBOUND_MAX_RETRIES,
+    OUTBOUND_PRIVATE_BURST,
+    OUTBOUND_PRIVATE_RATE,
+)
+
+
+class Priority(enum.IntEnum):
+    """Чем меньше, тем раньше уходит запрос"""
+
+    MODERATION = 0
+    CAPTCHA = 1
+    REPLY = 2
+
+
+# методы, которые действуют в чате и попадают под лимиты Telegram;
+# get*, answerCallbackQuery и getUpdates идут без очереди
+_LIMITED_PREFIXES = (
+    "send",
+    "edit",
+    "delete",
+    "forward",
+    "copy",
+    "ban",
+    "restrict",
+    "approve",
+    "decline",
+    "pin",
+    "unpin",
+)
+# лимит чата (20 сообщений в минуту в группе) считает только
+# появление и изменение сообщений; удаления и баны — в общем лимите
+_PER_CHAT_PREFIXES = ("send", "edit", "forward", "copy")
+
+_MODERATION_METHODS = {
+    "deleteMessage",
+    "deleteMessages",
+    "banChatMember",
+    "restrictChatMember",
+    "declineChatJoinRequest",
+}
+
+_priority: ContextVar[Priority | None] = ContextVar(
+    "outbound_priority",
+    default=None,
+)
+
+
+@contextlib.contextmanager
+def outbound_priority(priority: Priority) -> Iterator[None]:
+    """Приоритет для всех запросов внутри блока (например, капча)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class PriorityGate:
+    """
+    Token bucket с очередью по приоритету.
+
+    Пока очередь пуста и токены есть, acquire не ждёт; иначе запрос
+    встаёт в кучу (priority, порядок), и одна задача выпускает их
+    по мере пополнения токенов.
+    """
+
+    _order = itertools.count()
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._pump: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return not self._waiters and self._tokens >= self.burst
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        # во время блокировки _updated в будущем — запас не копится
+        if now <= self._updated:
+            return
+
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+
+    def _delay(self) -> float:
+        blocked = self._blocked_until - time.monotonic()
+        if blocked > 0:
+            return blocked
+
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self, priority: Priority) -> None:
+        if not self._waiters and self._delay() == 0:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters,
+            (priority, next(self._order), future),
+        )
+
+        if self._pump is None:
+            self._pump = asyncio.create_task(self._release_waiters())
+
+        await future
+
+    async def _release_waiters(self) -> None:
+        try:
+            while self._waiters:
+                delay = self._delay()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                _, _, future = heapq.heappop(self._waiters)
+                # ожидавший запрос отменён — токен не тратим
+                if future.done():
+                    continue
+
+                self._tokens -= 1
+                future.set_result(None)
+        finally:
+            self._pump = None
+
+    def block(self, seconds: float) -> None:
+        """После 429: ничего не выпускать ближайшие seconds секунд"""
+        self._blocked_until = max(
+            self._blocked_until,
+            time.monotonic() + seconds,
+        )
+        # запас начинает копиться с нуля, когда блокировка кончится
+        self._tokens = 0
+        self._updated = self._blocked_until
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """
+    Все запросы бота к Bot API проходят здесь.
+
+    Отправка и редактирование ждут токен в лимите чата (для личных
+    и групповых чатов свои значения), все действия в чатах — в общем
+    лимите; в очередях первыми идут удаления и ограничения, затем
+    капча, затем обычные ответы. На TelegramRetryAfter лимит чата
+    закрывается на retry_after (без лимита чата — запрос ждёт сам),
+    и запрос повторяется.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        global_burst: int,
+        private_rate: float,
+        private_burst: int,
+        group_rate: float,
+        group_burst: int,
+        max_retries: int,
+        max_chats: int,
+    ):
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+
+        self._global = PriorityGate(global_rate, global_burst)
+        self._chats: OrderedDict[int | str, PriorityGate] = OrderedDict()
+
+        self.sent: Counter[str] = Counter()
+        self.retry_after = 0
+        self.failed = 0
+        self.max_wait = 0.0
+
+    def _chat_gate(self, chat_id: int | str) -> PriorityGate:
+        gate = self._chats.get(chat_id)
+        if gate is not None:
+            self._chats.move_to_end(chat_id)
+            return gate
+
+        # отрицательные id — группы и каналы, у них лимит строже
+        if isinstance(chat_id, int) and chat_id > 0:
+            gate = PriorityGate(self.private_rate, self.private_burst)
+        else:
+            gate = PriorityGate(self.group_rate, self.group_burst)
+        self._chats[chat_id] = gate
+
+        if len(self._chats) > self.max_chats:
+            # вытесняем самый старый чат без очереди и с полным запасом
+            for old_id, old_gate in self._chats.items():
+                if old_gate.idle:
+                    del self._chats[old_id]
+                    break
+
+        return gate
+
+    @staticmethod
+    def _priority(api_method: str) -> Priority:
+        if api_method in _MODERATION_METHODS:
+            return Priority.MODERATION
+        priority = _priority.get()
+        return Priority.REPLY if priority is None else priority
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        api_method = method.__api_method__
+
+        # long polling: свой цикл повторов в aiogram
+        if api_method == "getUpdates":
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        limited = (
+            chat_id is not None
+            and api_method.startswith(_LIMITED_PREFIXES)
+        )
+        chat_gate = (
+            self._chat_gate(chat_id)
+            if limited and api_method.startswith(_PER_CHAT_PREFIXES)
+            else None
+        )
+        priority = self._priority(api_method)
+
+        for attempt in range(self.max_retries + 1):
+            if limited:
+                started = time.monotonic()
+                if chat_gate is not None:
+                    await chat_gate.acquire(priority)
+                await self._global.acquire(priority)
+                self.max_wait = max(
+                    self.max_wait,
+                    time.monotonic() - started,
+                )
+
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retry_after += 1
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+
+                if chat_gate is not None:
+                    chat_gate.block(e.retry_after)
+                else:
+                    await asyncio.sleep(e.retry_after)
+                continue
+
+            if limited:
+                self.sent[priority.name] += 1
+            return response
+
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "global_queue_depth": self._global.depth,
+            "chat_queue_depth": sum(g.depth for g in self._chats.values()),
+            "chats": len(self._chats),
+            "sent": dict(self.sent),
+            "retry_after": self.retry_after,
+            "failed": self.failed,
+            "max_wait": self.max_wait,
+        }
+
+
+outbound = OutboundScheduler(
+    global_rate=OUTBOUND_GLOBAL_RATE,
+    global_burst=OUTBOUND_GLOBAL_BURST,
+    private_rate=OUTBOUND_PRIVATE_RATE,
+    private_burst=OUTBOUND_PRIVATE_BURST,
+    group_rate=OUTBOUND_GROUP_RATE,
+    group_burst=OUTBOUND_GROUP_BURST,
+    max_retries=OUTBOUND_MAX_RETRIES,
+    max_chats=OUTBOUND_MAX_CHATS,
+)
@@ -2,6 +2,7 @@ from datetime import date
 from sqlalchemy import update, func
 from constants.group_constants import GroupType
 from database.groups import Group
+from moderation.group_context import group_contexts
 
 
 async def check_daily_payments(session_maker):
@@ -23,3 +24,6 @@ async def check_daily_payments(session_maker):
 
         await session.execute(stmt)
         await session.commit()
+
+    # подписки могли истечь у любых групп — сбрасываем снимки целиком
+    group_contexts.clear()
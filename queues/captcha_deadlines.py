@@ -0,0 +1,182 @@
+import asyncio
+import heapq
+import time
+from collections import defaultdict
+from typing import Any
+
+from aiogram import Bot
+
+from constants.captcha_constants import CAPTCHA_EXPIRY_BATCH_WINDOW
+from outgoing.bulk_delete import delete_messages_bulk
+from queues.captcha_store import (
+    PendingCaptcha,
+    PendingCaptchaStore,
+    captcha_store,
+)
+
+
+class CaptchaDeadlineScheduler:
+    """
+    Таймауты капчи без задачи на каждого пользователя.
+
+    Записи лежат в куче по дедлайну, одна фоновая задача спит до
+    ближайшего дедлайна и разбирает все истёкшие записи пачкой:
+    сообщения удаляются одним deleteMessages на чат.
+    Подтверждённые капчи просто убираются из индекса — их элементы
+    в куче пропускаются при извлечении.
+
+    Все изменения дублируются в store; при старте записи загружаются
+    оттуда разом, а истёкшие за время простоя удаляются первой пачкой.
+    """
+
+    def __init__(self, batch_window: float, store: PendingCaptchaStore):
+        self.batch_window = batch_window
+        self.store = store
+
+        self._heap: list[tuple[float, int, int]] = []
+        self._pending: dict[tuple[int, int], PendingCaptcha] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._bot: Bot | None = None
+
+        self.expired = 0
+        self.solved = 0
+        self.batches = 0
+
+    def start(self, bot: Bot) -> None:
+        if self._task is not None:
+            return
+
+        self._bot = bot
+        self._restore(self.store.load())
+        self._task = asyncio.create_task(self._run())
+
+    def _restore(self, records: list[PendingCaptcha]) -> None:
+        for record in records:
+            self._pending[(record.chat_id, record.user_id)] = record
+            self._heap.append((record.deadline, record.chat_id, record.user_id))
+
+        heapq.heapify(self._heap)
+
+        if records:
+            print(f"Восстановлено ожидающих капч: {len(records)}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        return key in self._pending
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, record: PendingCaptcha) -> bool:
+        key = (record.chat_id, record.user_id)
+        if key in self._pending:
+            return False
+
+        self._pending[key] = record
+        self.store.put(record)
+        heapq.heappush(self._heap, (record.deadline, *key))
+
+        # будим задачу, только если дедлайн стал ближайшим
+        if self._heap[0][0] == record.deadline:
+            self._wakeup.set()
+        return True
+
+    def get(self, chat_id: int, user_id: int) -> PendingCaptcha | None:
+        return self._pending.get((chat_id, user_id))
+
+    def pop(self, chat_id: int, user_id: int) -> PendingCaptcha | None:
+        record = self._pending.pop((chat_id, user_id), None)
+        if record is not None:
+            self.store.discard(chat_id, user_id)
+            self.solved += 1
+        return record
+
+    def _pop_expired(self, now: float) -> list[PendingCaptcha]:
+        expired = []
+        limit = now + self.batch_window
+
+        while self._heap and self._heap[0][0] <= limit:
+            deadline, chat_id, user_id = heapq.heappop(self._heap)
+            record = self._pending.get((chat_id, user_id))
+
+            # капча уже пройдена или заменена новой записью
+            if record is None or record.deadline != deadline:
+                continue
+
+            del self._pending[(chat_id, user_id)]
+            self.store.discard(chat_id, user_id)
+            expired.append(record)
+
+        return expired
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+
+            if self._heap:
+                delay = self._heap[0][0] - time.time()
+            else:
+                delay = None
+
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except TimeoutError:
+                    pass
+                continue
+
+            expired = self._pop_expired(time.time())
+            if not expired:
+                continue
+
+            try:
+                await self.expire(expired)
+            except Exception as e:
+                print("Captcha expiry error:", e)
+
+    async def expire(self, records: list[PendingCaptcha]) -> None:
+        """Удаляет капчи и сообщения пользователей, по вызову на чат"""
+        by_chat: dict[int, list[int]] = defaultdict(list)
+        for record in records:
+            # 0 — капча была общей (рейд), её удаляет shared_prompts
+            by_chat[record.chat_id].extend(
+                message_id
+                for message_id in (record.captcha_msg_id, record.user_msg_id)
+                if message_id
+            )
+
+        self.expired += len(records)
+        self.batches += 1
+
+        await asyncio.gather(
+            *(
+                delete_messages_bulk(self._bot, chat_id, message_ids)
+                for chat_id, message_ids in by_chat.items()
+            )
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "heap_size": len(self._heap),
+            "expired": self.expired,
+            "solved": self.solved,
+            "batches": self.batches,
+        }
+
+
+captcha_deadlines = CaptchaDeadlineScheduler(
+    batch_window=CAPTCHA_EXPIRY_BATCH_WINDOW,
+    store=captcha_store,
+)
@@ -0,0 +1,108 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Any
+
+from constants.captcha_constants import (
+    CAPTCHA_IMAGE_MAX_USES,
+    CAPTCHA_IMAGE_POOL_SIZE,
+)
+from moderation.captcha_render import random_code, render_captcha
+
+
+@dataclass(slots=True)
+class CaptchaImage:
+    answer: int
+    png: bytes
+    # появляется после первой отправки, дальше картинка не загружается
+    file_id: str | None = None
+    uses: int = 0
+
+
+class CaptchaImagePool:
+    """
+    Готовые картинки для капчи.
+
+    Фоновая задача держит size отрисованных картинок; отправка берёт
+    случайную готовую и ничего не рисует. Одна картинка показывается
+    не больше max_uses раз (по file_id), потом заменяется новой, чтобы
+    ответы нельзя было выучить по file_unique_id.
+    """
+
+    def __init__(self, size: int, max_uses: int):
+        self.size = size
+        self.max_uses = max_uses
+
+        self._ready: list[CaptchaImage] = []
+        self._need = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.rendered = 0
+        self.taken = 0
+        self.empty = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._task = asyncio.create_task(self._produce())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def take(self) -> CaptchaImage | None:
+        """Случайная готовая картинка или None, если пул ещё пуст"""
+        if not self._ready:
+            self.empty += 1
+            return None
+
+        index = random.randrange(len(self._ready))
+        image = self._ready[index]
+        image.uses += 1
+        self.taken += 1
+
+        if image.uses >= self.max_uses:
+            self._ready[index] = self._ready[-1]
+            self._ready.pop()
+            self._need.set()
+
+        return image
+
+    async def _produce(self) -> None:
+        while True:
+            while len(self._ready) < self.size:
+                code = random_code()
+                try:
+                    png = await asyncio.to_thread(render_captcha, code)
+                except Exception as e:
+                    print("Captcha render error:", e)
+                    break
+
+                self._ready.append(CaptchaImage(answer=int(code), png=png))
+                self.rendered += 1
+
+            self._need.clear()
+            await self._need.wait()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ready": len(self._ready),
+            "uploaded": sum(image.file_id is not None for image in self._ready),
+            "rendered": self.rendered,
+            "taken": self.taken,
+            "empty": self.empty,
+        }
+
+
+captcha_images = CaptchaImagePool(
+    size=CAPTCHA_IMAGE_POOL_SIZE,
+    max_uses=CAPTCHA_IMAGE_MAX_USES,
+)
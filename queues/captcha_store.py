@@ -0,0 +1,169 @@
+import asyncio
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+from constants.captcha_constants import (
+    CAPTCHA_STORE_FLUSH_INTERVAL,
+    CAPTCHA_STORE_PATH,
+)
+
+
+# меняется вместе с набором полей PendingCaptcha
+_TABLE = "pending_captcha_v2"
+
+
+@dataclass(slots=True)
+class PendingCaptcha:
+    chat_id: int
+    user_id: int
+    captcha_msg_id: int
+    user_msg_id: int
+    # time.time(), а не monotonic — запись должна пережить рестарт
+    deadline: float
+    # правильный код картинки; 0 — капча-кнопка
+    answer: int = 0
+
+
+# (chat_id, user_id) → запись или None (удалить)
+_Ops = dict[tuple[int, int], PendingCaptcha | None]
+
+
+class PendingCaptchaStore:
+    """
+    sqlite-копия ожидающих капч для восстановления после рестарта.
+
+    put/discard ничего не пишут сразу: изменения копятся и сбрасываются
+    одним executemany раз в flush_interval, повторные изменения одной
+    капчи схлопываются в последнее.
+    """
+
+    def __init__(self, path: str, flush_interval: float):
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._ops: _Ops = {}
+        # пачка, которая сейчас пишется в потоке; close() допишет её сам
+        self._writing: _Ops = {}
+        self._flush_task: asyncio.Task | None = None
+
+        self.flushes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def open(self) -> None:
+        if not self.path or self._db is not None:
+            return
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {_TABLE} ("
+            " chat_id INTEGER NOT NULL,"
+            " user_id INTEGER NOT NULL,"
+            " captcha_msg_id INTEGER NOT NULL,"
+            " user_msg_id INTEGER NOT NULL,"
+            " deadline REAL NOT NULL,"
+            " answer INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (chat_id, user_id)"
+            ") WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        if self._db is None:
+            return
+
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        with self._db_lock:
+            self._write({**self._writing, **self._ops})
+            self._ops = {}
+            self._db.close()
+            self._db = None
+
+    def load(self) -> list[PendingCaptcha]:
+        if self._db is None:
+            return []
+
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT chat_id, user_id, captcha_msg_id, user_msg_id, "
+                f"deadline, answer FROM {_TABLE}"
+            ).fetchall()
+
+        return [PendingCaptcha(*row) for row in rows]
+
+    def put(self, record: PendingCaptcha) -> None:
+        self._schedule((record.chat_id, record.user_id), record)
+
+    def discard(self, chat_id: int, user_id: int) -> None:
+        self._schedule((chat_id, user_id), None)
+
+    def _schedule(self, key: tuple[int, int], op: PendingCaptcha | None) -> None:
+        if self._db is None:
+            return
+
+        self._ops[key] = op
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+
+        ops = self._writing = self._ops
+        self._ops = {}
+        self._flush_task = None
+
+        try:
+            await asyncio.to_thread(self._locked_write, ops)
+        except Exception as e:
+            print("Captcha store error:", e)
+        finally:
+            if self._writing is ops:
+                self._writing = {}
+
+    def _locked_write(self, ops: _Ops) -> None:
+        with self._db_lock:
+            self._write(ops)
+
+    def _write(self, ops: _Ops) -> None:
+        if self._db is None or not ops:
+            return
+
+        self._db.executemany(
+            f"INSERT OR REPLACE INTO {_TABLE} "
+            "(chat_id, user_id, captcha_msg_id, user_msg_id, deadline, "
+            "answer) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    op.chat_id,
+                    op.user_id,
+                    op.captcha_msg_id,
+                    op.user_msg_id,
+                    op.deadline,
+                    op.answer,
+                )
+                for op in ops.values()
+                if op is not None
+            ],
+        )
+        self._db.executemany(
+            f"DELETE FROM {_TABLE} WHERE chat_id = ? AND user_id = ?",
+            [key for key, op in ops.items() if op is None],
+        )
+        self._db.commit()
+        self.flushes += 1
+
+
+captcha_store = PendingCaptchaStore(
+    path=CAPTCHA_STORE_PATH,
+    flush_interval=CAPTCHA_STORE_FLUSH_INTERVAL,
+)
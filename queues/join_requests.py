@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from constants.captcha_constants import (
+    JOIN_APPROVE_BATCH,
+    JOIN_APPROVE_INTERVAL,
+)
+
+
+@dataclass(slots=True)
+class PendingJoin:
+    chat_id: int
+    user_id: int
+    deadline: float
+    # правильный код картинки; 0 — капча-кнопка
+    answer: int = 0
+
+
+class JoinRequestQueue:
+    """
+    Заявки на вступление, ожидающие капчи в личке, и очередь решений.
+
+    Одобрения и отклонения не отправляются сразу: раз в interval
+    уходит не больше batch решений, параллельно (дальше их ограничивает
+    OutboundScheduler). Неотвеченные заявки отклоняются по дедлайну.
+    """
+
+    def __init__(self, interval: float, batch: int):
+        self.interval = interval
+        self.batch = batch
+
+        self._pending: dict[tuple[int, int], PendingJoin] = {}
+        # (chat_id, user_id, одобрить?)
+        self._decisions: deque[tuple[int, int, bool]] = deque()
+        self._task: asyncio.Task | None = None
+        self._bot: Bot | None = None
+
+        self.approved = 0
+        self.declined = 0
+        self.expired = 0
+        self.failed = 0
+
+    def start(self, bot: Bot) -> None:
+        if self._task is not None:
+            return
+
+        self._bot = bot
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        return key in self._pending
+
+    def add(self, pending: PendingJoin) -> None:
+        self._pending[(pending.chat_id, pending.user_id)] = pending
+
+    def pop(self, chat_id: int, user_id: int) -> PendingJoin | None:
+        return self._pending.pop((chat_id, user_id), None)
+
+    def approve(self, chat_id: int, user_id: int) -> None:
+        self._decisions.append((chat_id, user_id, True))
+
+    def decline(self, chat_id: int, user_id: int) -> None:
+        self._decisions.append((chat_id, user_id, False))
+
+    def _expire(self) -> None:
+        now = time.time()
+        expired = [
+            key for key, pending in self._pending.items()
+            if pending.deadline <= now
+        ]
+
+        for chat_id, user_id in expired:
+            del self._pending[(chat_id, user_id)]
+            self.decline(chat_id, user_id)
+
+        self.expired += len(expired)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+
+            self._expire()
+
+            batch = [
+                self._decisions.popleft()
+                for _ in range(min(self.batch, len(self._decisions)))
+            ]
+            if batch:
+                await asyncio.gather(
+                    *(self._decide(*decision) for decision in batch),
+                    return_exceptions=True,
+                )
+
+    async def _decide(self, chat_id: int, user_id: int, approve: bool) -> None:
+        try:
+            if approve:
+                await self._bot.approve_chat_join_request(chat_id, user_id)
+                self.approved += 1
+            else:
+                await self._bot.decline_chat_join_request(chat_id, user_id)
+                self.declined += 1
+        except (TelegramBadRequest, TelegramRetryAfter) as e:
+            # заявку уже обработал админ или она устарела
+            self.failed += 1
+            print(f"Заявка {user_id} в {chat_id}: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "decisions_queued": len(self._decisions),
+            "approved": self.approved,
+            "declined": self.declined,
+            "expired": self.expired,
+            "failed": self.failed,
+        }
+
+
+join_requests = JoinRequestQueue(
+    interval=JOIN_APPROVE_INTERVAL,
+    batch=JOIN_APPROVE_BATCH,
+)
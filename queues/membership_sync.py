@@ -0,0 +1,240 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot import engine
+from constants.group_constants import GroupUserRole
+from constants.user_constants import (
+    MEMBERSHIP_FLUSH_INTERVAL,
+    MEMBERSHIP_FLUSH_MAX,
+    MEMBERSHIP_KNOWN_MAX,
+)
+from database.identity_map import (
+    IdentityMap,
+    group_ids as group_id_map,
+    user_ids as user_id_map,
+)
+from database.users import User
+from database.users_groups import UserGroup
+
+
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# (telegram_user_id, chat_id)
+_Membership = tuple[int, int]
+
+
+async def _resolve(
+    session: AsyncSession,
+    identity: IdentityMap,
+    external_ids: Iterable[int],
+) -> dict[int, int]:
+    resolved: dict[int, int] = {}
+    missing: list[int] = []
+
+    for external_id in external_ids:
+        internal_id = identity.get(external_id)
+        if internal_id is None:
+            missing.append(external_id)
+        else:
+            resolved[external_id] = internal_id
+
+    if missing:
+        result = await session.execute(
+            select(identity.key, identity.pk).where(identity.key.in_(missing))
+        )
+        resolved.update(result.all())
+
+    return resolved
+
+
+class MembershipSync:
+    """
+    Запись «пользователь есть в группе» без запросов на каждое сообщение.
+
+    Наблюдения копятся в памяти (повторы схлопываются) и раз в interval
+    или при max_batch штук пишутся тремя запросами: upsert пользователей,
+    выборка недостающих id, upsert связей. Уже записанные связи с их
+    username хранятся в LRU и сразу отбрасываются. Если запись
+    не удалась, пачка возвращается в буфер до следующей попытки.
+    """
+
+    def __init__(self, interval: float, max_batch: int, known_max: int):
+        self.interval = interval
+        self.max_batch = max_batch
+        self.known_max = known_max
+
+        # (telegram_user_id, chat_id) → username
+        self._buffer: dict[_Membership, str | None] = {}
+        self._known: OrderedDict[_Membership, str | None] = OrderedDict()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.observed = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.written = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # остаток буфера — до закрытия движка
+        await self.flush()
+
+    def observe(
+        self,
+        telegram_user_id: int,
+        chat_id: int,
+        username: str | None,
+    ) -> None:
+        self.observed += 1
+
+        key = (telegram_user_id, chat_id)
+        # None username не меняет (coalesce во flush)
+        if key in self._known and username in (None, self._known[key]):
+            self._known.move_to_end(key)
+            self.skipped += 1
+            return
+
+        self._buffer[key] = username
+        if len(self._buffer) >= self.max_batch:
+            self._full.set()
+
+    def forget(self, telegram_user_id: int, chat_id: int) -> None:
+        """Пользователь вышел из группы — при возвращении записать снова"""
+        self._buffer.pop((telegram_user_id, chat_id), None)
+        self._known.pop((telegram_user_id, chat_id), None)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except TimeoutError:
+                pass
+            self._full.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                print("Membership sync error:", e)
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        batch, self._buffer = self._buffer, {}
+        try:
+            await self._write(batch)
+        except BaseException:
+            # наблюдения, пришедшие во время записи, новее пачки
+            self._buffer = {**batch, **self._buffer}
+            raise
+
+    async def _write(self, batch: dict[_Membership, str | None]) -> None:
+        usernames: dict[int, str | None] = {}
+        for (telegram_user_id, _), username in batch.items():
+            usernames[telegram_user_id] = username or usernames.get(
+                telegram_user_id
+            )
+
+        async with Session() as session:
+            users = insert(User).values(
+                [
+                    {"telegram_user_id": tg_id, "username": username}
+                    for tg_id, username in usernames.items()
+                ]
+            )
+            # без username в апдейте сохранённый не затирается
+            await session.execute(
+                users.on_duplicate_key_update(
+                    username=func.coalesce(
+                        users.inserted.username,
+                        User.username,
+                    ),
+                )
+            )
+
+            # id, которых ещё нет в карте, — двумя выборками на пачку
+            user_ids = await _resolve(session, user_id_map, usernames)
+            group_ids = await _resolve(
+                session,
+                group_id_map,
+                {chat_id for _, chat_id in batch},
+            )
+
+            # чаты без группы в БД (бот не добавлен как следует) пропускаем
+            memberships = [
+                {
+                    "user_id": user_ids[tg_id],
+                    "group_id": group_ids[chat_id],
+                    "role": GroupUserRole.MEMBER,
+                }
+                for tg_id, chat_id in batch
+                if tg_id in user_ids and chat_id in group_ids
+            ]
+
+            if memberships:
+                links = insert(UserGroup).values(memberships)
+                # существующая связь (и роль) не меняется
+                await session.execute(
+                    links.on_duplicate_key_update(role=UserGroup.role)
+                )
+
+            await session.commit()
+
+        # в карту — только после коммита вставок
+        for tg_id, user_id in user_ids.items():
+            user_id_map.put(tg_id, user_id)
+        for chat_id, group_id in group_ids.items():
+            group_id_map.put(chat_id, group_id)
+
+        self.flushes += 1
+        self.written += len(memberships)
+
+        for (tg_id, chat_id), username in batch.items():
+            if chat_id in group_ids:
+                self._remember((tg_id, chat_id), username)
+
+    def _remember(self, key: _Membership, username: str | None) -> None:
+        if username is None:
+            username = self._known.get(key)
+        self._known[key] = username
+        self._known.move_to_end(key)
+
+        while len(self._known) > self.known_max:
+            self._known.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "known": len(self._known),
+            "observed": self.observed,
+            "skipped": self.skipped,
+            "flushes": self.flushes,
+            "written": self.written,
+        }
+
+
+membership_sync = MembershipSync(
+    interval=MEMBERSHIP_FLUSH_INTERVAL,
+    max_batch=MEMBERSHIP_FLUSH_MAX,
+    known_max=MEMBERSHIP_KNOWN_MAX,
+)
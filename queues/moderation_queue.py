@@ -0,0 +1,67 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram.types import Message
+
+from constants.moderation_constants import MODERATION_QUEUE_SIZE
+from moderation.group_context import GroupContext
+
+
+@dataclass(slots=True)
+class ModerationJob:
+    message: Message
+    context: GroupContext
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ModerationQueue:
+    """Очередь фоновых проверок с ограничением размера и метриками"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[ModerationJob] = asyncio.Queue(maxsize)
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.processed = 0
+        self.deleted = 0
+        self.failed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def submit(self, job: ModerationJob) -> bool:
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    def record(self, job: ModerationJob, *, deleted: bool, failed: bool) -> None:
+        latency = time.monotonic() - job.enqueued_at
+
+        self.processed += 1
+        self.deleted += deleted
+        self.failed += failed
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "avg_latency": (
+                self.total_latency / self.processed if self.processed else 0.0
+            ),
+            "max_latency": self.max_latency,
+        }
+
+
+moderation_queue = ModerationQueue(MODERATION_QUEUE_SIZE)
@@ -7,6 +7,10 @@ from database.managers import GroupManager, UserManager, GroupSettingsManager
 from database.groups import GroupSettings
 from database.users_groups import UserGroup
 from constants.group_constants import GroupUserRole
+from moderation.group_context import group_contexts
+from moderation.media_scanner import media_violates
+from moderation.verified_members import verified_members
+from queues.moderation_queue import moderation_queue
 import utils
 
 
@@ -31,6 +35,7 @@ async def group_admins_worker(bot):
                     await GroupSettingsManager(session).create(
                         GroupSettings(group_id=group.id)
                     )
+                    group_contexts.invalidate_chat(chat_id)
 
                 try:
                     admins = await utils.get_chat_admins(chat_id)
@@ -90,9 +95,30 @@ async def group_admins_worker(bot):
                         rel.role = GroupUserRole.MEMBER
 
                 await session.commit()
+                # состав админов сменился целиком — перечитать при случае
+                verified_members.invalidate_chat(chat_id)
 
         except Exception as e:
             print("Worker error:", e)
 
         finally:
             group_admins_queue.task_done()
+
+
+async def moderation_worker():
+    while True:
+        job = await moderation_queue.queue.get()
+        deleted = failed = False
+
+        try:
+            if await media_violates(job.message, job.context):
+                await job.message.delete()
+                deleted = True
+
+        except Exception as e:
+            failed = True
+            print("Moderation worker error:", e)
+
+        finally:
+            moderation_queue.record(job, deleted=deleted, failed=failed)
+            moderation_queue.queue.task_done()
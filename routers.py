@@ -25,3 +25,6 @@ group_messages = Router(name="group_message")
 group_messages.message.filter(
     ChatTypeFilter(("group", "supergroup"))
 )
+
+
+join_requests_router = Router(name="join_requests_router")
@@ -0,0 +1,11 @@
+import importlib.util
+import os
+
+
+# bot.py создаёт Bot при импорте, токену достаточно быть похожим на настоящий
+os.environ.setdefault("BOT_TOKEN", "123:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi")
+
+# utils и keyboards.dm_keyboards импортируют друг друга; бот загружает
+# их через handlers, а тестам тот же порядок задаётся здесь
+if importlib.util.find_spec("aiogram") is not None:
+    import keyboards.dm_keyboards  # noqa: F401
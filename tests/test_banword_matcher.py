@@ -0,0 +1,41 @@
+from moderation.banword_matcher import BanwordMatcher
+from moderation.normalization import normalize
+
+
+def search(words, text):
+    return BanwordMatcher(words).search(normalize(text))
+
+
+def test_matches_whole_words_only():
+    assert search(["спам"], "тут спам!") == "спам"
+    assert search(["спам"], "спамер пишет") is None
+    assert search(["спам"], "антиспам") is None
+
+
+def test_matches_phrase_across_tokens():
+    assert search(["быстрый заработок"], "Быстрый   заработок, пиши") == (
+        "быстрый заработок"
+    )
+    assert search(["быстрый заработок"], "быстрый и заработок") is None
+
+
+def test_returns_first_word_found_in_text():
+    assert search(["казино", "ставки"], "ставки и казино") == "ставки"
+
+
+def test_overlapping_patterns_use_fail_links():
+    matcher = BanwordMatcher(["аб", "бв"])
+    assert matcher.search(normalize("х бв")) == "бв"
+    assert matcher.search(normalize("аб")) == "аб"
+
+
+def test_words_are_normalized_and_deduplicated():
+    matcher = BanwordMatcher(["Спам", "спам", "  ", "!!!"])
+    assert matcher.words == ("спам",)
+    assert len(matcher) == 1
+
+
+def test_empty_matcher():
+    matcher = BanwordMatcher([])
+    assert not matcher
+    assert matcher.search(normalize("спам")) is None
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from queues.captcha_deadlines import CaptchaDeadlineScheduler
+from queues.captcha_store import PendingCaptcha, PendingCaptchaStore
+
+
+class FakeBot:
+    def __init__(self):
+        self.deleted: list[tuple[int, list[int]]] = []
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.deleted.append((chat_id, message_ids))
+        return True
+
+
+def record(chat_id, user_id, deadline, captcha_msg_id=10, user_msg_id=11):
+    return PendingCaptcha(chat_id, user_id, captcha_msg_id, user_msg_id, deadline)
+
+
+def scheduler(batch_window=0.0, path=""):
+    # пустой путь — store выключен, put/discard ничего не пишут
+    return CaptchaDeadlineScheduler(
+        batch_window=batch_window,
+        store=PendingCaptchaStore(path, flush_interval=60),
+    )
+
+
+def test_expires_in_deadline_order():
+    deadlines = scheduler()
+    for user_id, deadline in ((1, 30.0), (2, 10.0), (3, 20.0)):
+        deadlines.add(record(-100, user_id, deadline))
+
+    expired = deadlines._pop_expired(now=25.0)
+
+    assert [r.user_id for r in expired] == [2, 3]
+    assert (-100, 1) in deadlines
+    assert len(deadlines) == 1
+
+
+def test_batch_window_takes_deadlines_just_ahead():
+    deadlines = scheduler(batch_window=5.0)
+    for user_id, deadline in ((1, 10.0), (2, 14.0), (3, 16.0)):
+        deadlines.add(record(-100, user_id, deadline))
+
+    expired = deadlines._pop_expired(now=10.0)
+
+    assert [r.user_id for r in expired] == [1, 2]
+
+
+def test_solved_captcha_is_skipped():
+    deadlines = scheduler()
+    deadlines.add(record(-100, 1, 10.0))
+    deadlines.add(record(-100, 2, 10.0))
+
+    assert deadlines.pop(-100, 1).user_id == 1
+    assert deadlines.pop(-100, 1) is None
+
+    expired = deadlines._pop_expired(now=10.0)
+    assert [r.user_id for r in expired] == [2]
+    assert deadlines.stats()["solved"] == 1
+
+
+def test_duplicate_add_is_rejected():
+    deadlines = scheduler()
+    assert deadlines.add(record(-100, 1, 10.0))
+    assert not deadlines.add(record(-100, 1, 5.0))
+
+    assert deadlines._pop_expired(now=7.0) == []
+
+
+def test_expire_deletes_once_per_chat():
+    deadlines = scheduler()
+    bot = FakeBot()
+    deadlines._bot = bot
+
+    asyncio.run(deadlines.expire([
+        record(-100, 1, 0.0, captcha_msg_id=12, user_msg_id=11),
+        record(-100, 2, 0.0, captcha_msg_id=14, user_msg_id=13),
+        # общая капча рейда: своего сообщения нет
+        record(-200, 3, 0.0, captcha_msg_id=0, user_msg_id=21),
+    ]))
+
+    assert sorted(bot.deleted) == [(-200, [21]), (-100, [11, 12, 13, 14])]
+    assert deadlines.stats()["batches"] == 1
+    assert deadlines.stats()["expired"] == 3
+
+
+def test_restores_pending_from_store(tmp_path):
+    path = str(tmp_path / "captcha.db")
+
+    async def fill():
+        store = PendingCaptchaStore(path, flush_interval=60)
+        store.open()
+        store.put(record(-100, 1, 20.0))
+        store.put(record(-100, 2, 10.0))
+        store.close()
+
+    asyncio.run(fill())
+
+    deadlines = scheduler(path=path)
+    deadlines.store.open()
+    deadlines._restore(deadlines.store.load())
+    deadlines.store.close()
+
+    assert len(deadlines) == 2
+    assert [r.user_id for r in deadlines._pop_expired(now=15.0)] == [2]
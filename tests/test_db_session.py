@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from middlewares.db_connection import LazySession
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_session_created_on_first_use():
+    sessions = []
+    lazy = LazySession(lambda: sessions.append(FakeSession()) or sessions[-1])
+
+    assert not lazy.used
+    asyncio.run(lazy.close())
+    assert sessions == []
+
+    assert lazy.closed is False
+    assert lazy.used
+    assert len(sessions) == 1
+
+
+def test_release_returns_connection_and_reopens_on_demand():
+    sessions = []
+    lazy = LazySession(lambda: sessions.append(FakeSession()) or sessions[-1])
+
+    lazy.closed
+    asyncio.run(lazy.release())
+    assert sessions[0].closed
+    # счётчик апдейтов с БД не сбрасывается
+    assert lazy.used
+
+    # обращение после release — новая сессия
+    assert lazy.closed is False
+    assert len(sessions) == 2
+
+    asyncio.run(lazy.close())
+    assert sessions[1].closed
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from queues.membership_sync import MembershipSync
+
+
+def sync():
+    return MembershipSync(interval=60, max_batch=100, known_max=3)
+
+
+def test_known_membership_is_skipped_until_username_changes():
+    members = sync()
+    members._remember((1, -100), "old")
+
+    members.observe(1, -100, "old")
+    # апдейт без username сохранённый не меняет
+    members.observe(1, -100, None)
+    assert members._buffer == {}
+    assert members.skipped == 2
+
+    members.observe(1, -100, "new")
+    assert members._buffer == {(1, -100): "new"}
+
+
+def test_forget_drops_buffer_and_known():
+    members = sync()
+    members._remember((1, -100), "a")
+    members._remember((1, -200), "a")
+    members.observe(2, -100, "b")
+
+    members.forget(1, -100)
+    members.forget(2, -100)
+
+    assert list(members._known) == [(1, -200)]
+    assert members._buffer == {}
+
+
+def test_known_is_bounded_lru():
+    members = sync()
+    for user_id in range(5):
+        members._remember((user_id, -100), None)
+
+    assert list(members._known) == [(2, -100), (3, -100), (4, -100)]
+
+
+def test_failed_flush_keeps_batch(monkeypatch):
+    members = sync()
+
+    async def fail(batch):
+        # наблюдение во время записи новее пачки
+        members.observe(1, -100, "newer")
+        raise ConnectionError("db is down")
+
+    monkeypatch.setattr(members, "_write", fail)
+    members.observe(1, -100, "older")
+    members.observe(2, -100, "b")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(members.flush())
+
+    assert members._buffer == {(1, -100): "newer", (2, -100): "b"}
+
@@ -0,0 +1,53 @@
+from moderation.normalization import normalize, normalize_banword
+
+
+def test_lowercase_and_punctuation():
+    assert normalize("Привет, МИР!!!") == ["привет", "мир"]
+
+
+def test_latin_homoglyphs_fold_to_cyrillic():
+    # латинские c, p, a, m складываются в похожие кириллические с, р, а, м
+    # (латинская p — это «р», а не «п»)
+    assert normalize("cpam") == ["срам"]
+    assert normalize("cпaм") == normalize("спам") == ["спам"]
+
+
+def test_greek_homoglyphs_fold_to_cyrillic():
+    assert normalize("κазино") == ["казино"]
+
+
+def test_leet_digits():
+    assert normalize("4ат") == ["чат"]
+    assert normalize("6ан") == ["бан"]
+    assert normalize("з0л0то") == ["золото"]
+    assert normalize("3ло") == ["зло"]
+
+
+def test_digits_fold_the_same_in_words_and_text():
+    # бан-слово и текст сворачиваются одинаково, поэтому совпадают
+    assert normalize("2025") == ["2о25"]
+    assert normalize("2о25") == normalize("2025")
+    assert normalize("1789") == ["1789"]
+
+
+def test_invisible_characters_are_removed():
+    assert normalize("ка​зи­но") == ["казино"]
+
+
+def test_fullwidth_letters_are_nfkc_folded():
+    assert normalize("ｃａｓｉｎｏ") == normalize("casino")
+
+
+def test_spaced_letters_are_joined():
+    assert normalize("с п а м тут") == ["спам", "тут"]
+    assert normalize("s.p.a.m") == normalize("spam")
+
+
+def test_short_spaced_runs_are_kept():
+    # одна-две одиночные буквы — обычные слова, не разрядка
+    assert normalize("я и ты") == ["я", "и", "ты"]
+
+
+def test_normalize_banword_joins_tokens():
+    assert normalize_banword("  Быстрый   ЗАРАБОТОК ") == "быстрый заработок"
+    assert normalize_banword("!!!") == ""
@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("pytesseract")
+
+from benchmarks.ocr_preprocess_bench import bench, synthetic_corpus
+from constants.group_constants import OcrProfile
+
+
+def test_fast_profile_reads_every_synthetic_line():
+    # фото с текстом на шумном фоне, абзацы и длинные скриншоты
+    results = bench(synthetic_corpus(40), repeat=1, with_tesseract=False)
+
+    for profile in (OcrProfile.FAST, OcrProfile.ACCURATE):
+        result = results[profile]
+        assert result.lines_found == result.lines_total, profile
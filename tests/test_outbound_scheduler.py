@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from outgoing import scheduler
+from outgoing.scheduler import Priority, PriorityGate
+
+
+def test_tokens_refill_at_rate(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(scheduler.time, "monotonic", lambda: now[0])
+    gate = PriorityGate(rate=2, burst=3)
+
+    async def spend(count):
+        for _ in range(count):
+            await gate.acquire(Priority.REPLY)
+
+    asyncio.run(spend(3))
+    assert gate._delay() == pytest.approx(0.5)
+
+    now[0] += 1
+    assert gate._delay() == 0
+    assert gate._tokens == pytest.approx(2)
+
+    # запас не растёт выше burst
+    now[0] += 60
+    assert gate.idle
+    assert gate._tokens == 3
+
+
+def test_waiters_released_by_priority():
+    released = []
+
+    async def main():
+        gate = PriorityGate(rate=50, burst=1)
+        await gate.acquire(Priority.REPLY)
+
+        async def request(priority):
+            await gate.acquire(priority)
+            released.append(priority)
+
+        tasks = []
+        for priority in (
+            Priority.REPLY,
+            Priority.CAPTCHA,
+            Priority.REPLY,
+            Priority.MODERATION,
+        ):
+            tasks.append(asyncio.create_task(request(priority)))
+            await asyncio.sleep(0)
+
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    assert released == [
+        Priority.MODERATION,
+        Priority.CAPTCHA,
+        Priority.REPLY,
+        Priority.REPLY,
+    ]
+
+
+def test_cancelled_waiter_does_not_spend_token():
+    async def main():
+        gate = PriorityGate(rate=50, burst=1)
+        await gate.acquire(Priority.REPLY)
+
+        cancelled = asyncio.create_task(gate.acquire(Priority.MODERATION))
+        waiting = asyncio.create_task(gate.acquire(Priority.REPLY))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await waiting
+        return gate
+
+    gate = asyncio.run(main())
+    assert gate.depth == 0
+    assert gate._tokens < 1
+
+
+def test_block_holds_queue_until_retry_after(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(scheduler.time, "monotonic", lambda: now[0])
+    gate = PriorityGate(rate=10, burst=5)
+
+    gate.block(3)
+    assert gate._delay() == pytest.approx(3)
+
+    now[0] += 3
+    # после блокировки запас копится с нуля
+    assert gate._delay() == pytest.approx(0.1)
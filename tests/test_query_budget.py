@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("aiogram")
+pytest.importorskip("aiosqlite")
+
+from aiogram import Dispatcher
+from aiogram.types import Chat, Message, Update, User as TelegramUser
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database.base
+from bot import bot
+from constants.captcha_constants import CaptchaStatus
+from constants.db_constants import QUERY_BUDGET
+from database.captcha_logs import CaptchaLogs
+from database.groups import Group, GroupSettings
+from database.query_stats import assert_query_budget, instrument
+from database.users import User
+from main import setup_dispatcher
+
+
+CHAT_ID = -1001234567890
+TELEGRAM_USER_ID = 555
+
+
+def group_text(update_id: int) -> Update:
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=CHAT_ID, type="supergroup", title="test"),
+            from_user=TelegramUser(
+                id=TELEGRAM_USER_ID,
+                is_bot=False,
+                first_name="member",
+            ),
+            text="привет всем",
+        ),
+    )
+
+
+async def fill(session_pool: async_sessionmaker) -> None:
+    # BigInteger-ключи в sqlite не автоинкрементятся — id явные
+    async with session_pool() as session:
+        session.add_all([
+            Group(id=1, chat_id=CHAT_ID),
+            GroupSettings(id=1, group_id=1),
+            User(id=1, telegram_user_id=TELEGRAM_USER_ID),
+            CaptchaLogs(
+                id=1,
+                user_id=1,
+                group_id=1,
+                status=CaptchaStatus.SOLVED,
+            ),
+        ])
+        await session.commit()
+
+
+def test_verified_member_text_stays_within_budget(tmp_path):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/db.sqlite3")
+        session_pool = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with engine.begin() as conn:
+            await conn.run_sync(database.base.Base.metadata.create_all)
+        await fill(session_pool)
+
+        instrument(engine)
+        dp = Dispatcher()
+        setup_dispatcher(dp, session_pool)
+
+        # холодные кэши: группа с настройками, id пользователя, капча
+        with assert_query_budget(QUERY_BUDGET, "cold") as cold:
+            await dp.feed_update(bot, group_text(1))
+        assert cold.queries > 0
+
+        # дальше всё из кэшей
+        with assert_query_budget(0, "warm"):
+            await dp.feed_update(bot, group_text(2))
+
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_over_budget_lists_statements(tmp_path):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/db.sqlite3")
+        instrument(engine)
+
+        with pytest.raises(AssertionError, match="1 запросов при бюджете 0"):
+            with assert_query_budget(0):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+
+        await engine.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from aiogram.types import User as TelegramUser
+
+from moderation import raid_mode
+from moderation.raid_mode import RaidDetector, SharedCaptchaPrompts
+from queues.captcha_deadlines import CaptchaDeadlineScheduler
+from queues.captcha_store import PendingCaptchaStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(raid_mode.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_raid_after_threshold_within_window(clock):
+    detector = RaidDetector(window=10, threshold=3, cooldown=60)
+
+    assert not detector.record(-100)
+    assert not detector.record(-100)
+    assert detector.record(-100)
+    assert detector.raids == 1
+
+    clock[0] += 61
+    assert not detector.is_active(-100)
+
+
+def test_slow_joins_are_not_a_raid(clock):
+    detector = RaidDetector(window=10, threshold=3, cooldown=60)
+
+    for _ in range(5):
+        assert not detector.record(-100)
+        clock[0] += 6
+
+
+def test_quiet_chats_are_swept(clock):
+    detector = RaidDetector(window=10, threshold=3, cooldown=5)
+
+    for chat_id in range(-1, -51, -1):
+        detector.record(chat_id)
+    for _ in range(3):
+        detector.record(-500)
+    assert len(detector._events) == 51
+
+    clock[0] += 11
+    detector.record(-1)
+
+    assert set(detector._events) == {-1}
+    assert detector._raid_until == {}
+
+
+def user(user_id):
+    return TelegramUser(id=user_id, is_bot=False, first_name=f"u{user_id}")
+
+
+def test_shared_prompt_answer_per_chat():
+    prompts = SharedCaptchaPrompts(
+        deadlines=CaptchaDeadlineScheduler(0, PendingCaptchaStore("", 60)),
+        edit_interval=5,
+        max_mentions=20,
+    )
+
+    answer = prompts.add(-100, user(1), image_mode=True)
+    assert answer
+    # код один на всё общее сообщение
+    assert prompts.add(-100, user(2), image_mode=True) == answer
+
+    assert prompts.add(-200, user(3), image_mode=False) == 0
+
+
+def test_refresh_errors_are_logged(capsys):
+    prompts = SharedCaptchaPrompts(
+        deadlines=CaptchaDeadlineScheduler(0, PendingCaptchaStore("", 60)),
+        edit_interval=5,
+        max_mentions=20,
+    )
+    prompts.add(-100, user(1), image_mode=False)
+    prompts.add(-200, user(2), image_mode=False)
+
+    refreshed = []
+
+    async def refresh(chat_id, prompt):
+        if chat_id == -100:
+            raise RuntimeError("edit failed")
+        refreshed.append(chat_id)
+
+    prompts._refresh = refresh
+    asyncio.run(prompts._refresh_all())
+
+    assert refreshed == [-200]
+    assert "Shared captcha error in -100: edit failed" in capsys.readouterr().out
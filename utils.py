@@ -15,12 +15,21 @@ from database.managers import (
     PromocodeManager,
 )
 from database.groups import GroupType, Group
+from moderation.group_context import group_contexts
 import keyboards.dm_keyboards
 
 
 class CaptchaCallbackData(CallbackData, prefix="captcha"):
     chat_id: int
     telegram_user_id: int
+    # вариант ответа на кнопке капчи-картинки; 0 — капча-кнопка
+    answer: int = 0
+
+
+class JoinCaptchaCallbackData(CallbackData, prefix="join"):
+    # капча в личке по заявке на вступление в chat_id
+    chat_id: int
+    answer: int = 0
 
 
 async def get_chat_admins(chat_id):
@@ -148,6 +157,7 @@ async def activate_group_subscription(
         subscription_type=GroupType.PAID,
         paid_until=paid_until + relativedelta(months=months),
     )
+    group_contexts.invalidate_group(group_id)
 
     return True
 